@@ -1,8 +1,122 @@
+from datetime import date
+
 from django.contrib import admin
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from add_meters.jobs import enqueue_job
+from add_meters.models import AddMeterData, AnomalyState, GatewayToken, Job, Meter, Profile
+from add_meters.reports import REPORT_GROUPS, REPORT_MONTHS
+from add_meters.validation import METER_FIELDS
+
+
+@admin.register(AddMeterData)
+class AddMeterDataAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/add_meters/addmeterdata/change_list.html'
+    list_display = ('user', 'created', *METER_FIELDS, 'updated')
+    list_select_related = ('user',)
+    list_filter = ('created',)
+    date_hierarchy = 'created'
+    search_fields = ('user__username', 'user__last_name')
+    ordering = ('-created',)
+    raw_id_fields = ('user',)
+    # Counting millions of rows on every changelist page is the slowest part of the admin.
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_urls(self):
+        urls = [
+            path('reports/', self.admin_site.admin_view(self.reports_view), name='add_meters_addmeterdata_reports'),
+        ]
+        return urls + super().get_urls()
+
+    def reports_view(self, request):
+        """Queue a consumption report on POST; show its progress and then its result on GET ``?job=<id>``."""
+        params = request.POST if request.method == 'POST' else request.GET
+        group = params.get('group', 'building')
+        if group not in REPORT_GROUPS:
+            group = 'building'
+        try:
+            months = int(params.get('months', 12))
+        except ValueError:
+            months = 12
+        if months not in REPORT_MONTHS:
+            months = 12
+
+        if request.method == 'POST':
+            job = enqueue_job('report', request.user, {'group': group, 'months': months})
+            return redirect(f'{request.path}?job={job.pk}')
+
+        job = None
+        if request.GET.get('job', '').isdigit():
+            job = get_object_or_404(Job, pk=request.GET['job'], kind='report', user=request.user)
+            group, months = job.params['group'], job.params['months']
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Consumption reports',
+            'group': group,
+            'group_choices': REPORT_GROUPS,
+            'months': months,
+            'month_choices': REPORT_MONTHS,
+            'meter_fields': METER_FIELDS,
+            'job': job,
+        }
+        if job is not None and job.status == Job.DONE:
+            context['totals'] = job.result['totals']
+            context['monthly'] = [
+                {**row, 'month': date.fromisoformat(row['month'])} for row in job.result['monthly']
+            ]
+        return TemplateResponse(request, 'admin/add_meters/addmeterdata/reports.html', context)
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('last_name', 'first_name', 'city', 'street', 'building', 'apartment', 'user')
+    list_select_related = ('user',)
+    list_filter = ('city',)
+    search_fields = ('last_name', 'first_name', 'street', 'building', 'user__username')
+    raw_id_fields = ('user',)
+
+
+@admin.register(Meter)
+class MeterAdmin(admin.ModelAdmin):
+    list_display = ('label', 'kind', 'unit', 'position', 'user')
+    list_select_related = ('user',)
+    list_filter = ('kind',)
+    search_fields = ('label', 'user__username')
+    raw_id_fields = ('user',)
+
+
+@admin.register(AnomalyState)
+class AnomalyStateAdmin(admin.ModelAdmin):
+    list_display = ('meter', 'status', 'last_created', 'last_value', 'score', 'readings')
+    list_select_related = ('meter',)
+    list_filter = ('status',)
+    search_fields = ('meter__user__username', 'meter__label')
+    raw_id_fields = ('meter',)
+    readonly_fields = ('state',)
+
 
-from add_meters.models import AddMeterData, Profile
+@admin.register(GatewayToken)
+class GatewayTokenAdmin(admin.ModelAdmin):
+    # Keys are issued with the create_gateway_token command; the admin only lists and disables them.
+    list_display = ('name', 'city', 'street', 'building', 'is_active', 'created', 'last_used')
+    list_filter = ('is_active', 'city')
+    search_fields = ('name', 'city', 'street', 'building')
+    readonly_fields = ('created', 'last_used')
 
+    def has_add_permission(self, request):
+        return False
 
-admin.site.register(AddMeterData)
-admin.site.register(Profile)
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'user', 'status', 'progress', 'attempts', 'created', 'finished', 'worker')
+    list_select_related = ('user',)
+    list_filter = ('status', 'kind')
+    search_fields = ('user__username', 'message')
+    raw_id_fields = ('user',)
+    readonly_fields = ('created', 'started', 'finished', 'worker', 'attempts', 'progress', 'result')
@@ -0,0 +1,185 @@
+from array import array
+from datetime import date, timedelta
+from operator import sub
+
+from django.utils import timezone
+
+from .rollups import get_bucket_start
+from .validation import METER_FIELDS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; every computation has a pure-Python path.
+    np = None
+
+
+HAS_NUMPY = np is not None
+EPOCH = date(1970, 1, 1)
+
+
+class ReadingColumns:
+    """A reading series held column-wise: one timestamp list plus one integer array per meter.
+
+    With NumPy installed the meter columns are ``int64`` arrays and all computations
+    are vectorized; otherwise they are ``array('q')`` and computed in plain Python.
+    ``partition`` optionally holds one group id (user id) per row; differences are
+    never taken across two partitions.
+    """
+
+    def __init__(self, created, values, partition=None, vectorized=None):
+        self.created = list(created)
+        self.vectorized = HAS_NUMPY if vectorized is None else (vectorized and HAS_NUMPY)
+        self.values = {key: self._as_column(column) for key, column in values.items()}
+        self.partition = self._as_column(partition) if partition is not None else None
+
+    def _as_column(self, column):
+        if self.vectorized:
+            return np.asarray(column, dtype=np.int64)
+        return array('q', column)
+
+    def __len__(self):
+        return len(self.created)
+
+    def _pair_mask(self):
+        """Which consecutive row pairs belong to the same partition, or None when all do."""
+        if self.partition is None:
+            return None
+        if self.vectorized:
+            return self.partition[1:] == self.partition[:-1]
+        return [a == b for a, b in zip(self.partition, self.partition[1:])]
+
+    def deltas(self):
+        """Consumption between consecutive readings, per meter (pairs across partitions are zero)."""
+        mask = self._pair_mask()
+        result = {}
+        for key, column in self.values.items():
+            if self.vectorized:
+                diff = np.diff(column)
+                if mask is not None:
+                    diff = np.where(mask, diff, 0)
+            else:
+                diff = array('q', map(sub, column[1:], column[:-1]))
+                if mask is not None:
+                    diff = array('q', (value if same else 0 for value, same in zip(diff, mask)))
+            result[key] = diff
+        return result
+
+    def totals(self):
+        if self.partition is None:
+            # Deltas telescope, so one partition only needs the endpoints.
+            return {
+                key: int(column[-1] - column[0]) if len(column) > 1 else 0
+                for key, column in self.values.items()
+            }
+        return {key: int(sum(diff)) for key, diff in self.deltas().items()}
+
+    def range_days(self):
+        if not self.created:
+            return 0
+        return max(1, (self.created[-1].date() - self.created[0].date()).days + 1)
+
+    def _local_day_numbers(self):
+        tz = timezone.get_current_timezone()
+        epoch = EPOCH.toordinal()
+        return [value.astimezone(tz).toordinal() - epoch for value in self.created]
+
+    def bucket_sums(self, bucket_type):
+        """Return ``[(bucket_start, {meter_key: consumption})]`` ordered by bucket.
+
+        Each delta is attributed to the bucket of the later reading of its pair.
+        """
+        if len(self) < 2:
+            return []
+        days = self._local_day_numbers()[1:]
+        deltas = self.deltas()
+        mask = self._pair_mask()
+        if self.vectorized:
+            return self._bucket_sums_numpy(np.asarray(days, dtype=np.int64), deltas, mask, bucket_type)
+
+        buckets = {}
+        for index, day in enumerate(days):
+            if mask is not None and not mask[index]:
+                continue
+            start = get_bucket_start(EPOCH + timedelta(days=day), bucket_type)
+            bucket = buckets.setdefault(start, dict.fromkeys(deltas, 0))
+            for key, column in deltas.items():
+                bucket[key] += column[index]
+        return sorted(buckets.items())
+
+    @staticmethod
+    def _bucket_sums_numpy(days, deltas, mask, bucket_type):
+        if bucket_type == 'week':
+            # 1970-01-01 was a Thursday; shift to the Monday of each ISO week.
+            keys = days - (days + 3) % 7
+        elif bucket_type == 'month':
+            keys = days.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+        else:
+            keys = days
+        if mask is not None:
+            keys = keys[mask]
+            deltas = {key: column[mask] for key, column in deltas.items()}
+
+        starts, inverse = np.unique(keys, return_inverse=True)
+        sums = {}
+        for key, column in deltas.items():
+            total = np.zeros(len(starts), dtype=np.int64)
+            np.add.at(total, inverse, column)
+            sums[key] = total.tolist()
+        return [
+            (EPOCH + timedelta(days=int(start)), {key: sums[key][index] for key in deltas})
+            for index, start in enumerate(starts.tolist())
+        ]
+
+
+def summarize_buckets(bucket_values, range_days, meter_keys=METER_FIELDS):
+    """Per-meter total, trend (last bucket minus the one before) and average per day."""
+    summaries = {}
+    for key in meter_keys:
+        column = [values[key] for values in bucket_values]
+        total = sum(column)
+        summaries[key] = {
+            'total': total,
+            'trend': column[-1] - column[-2] if len(column) >= 2 else 0,
+            'avg_per_day': round(total / range_days, 2) if range_days else 0,
+        }
+    return summaries
+
+
+def downsample_indices(series, max_points):
+    """Indices of at most ``max_points`` points chosen by Largest-Triangle-Three-Buckets.
+
+    ``series`` are equally long value lists sharing one x axis; each is scaled to its
+    largest magnitude so a meter with small numbers still shapes the selection. The
+    first and last points are always kept. ``max_points`` below 3 disables downsampling.
+    """
+    length = len(series[0]) if series else 0
+    if max_points < 3 or length <= max_points:
+        return list(range(length))
+
+    scaled = []
+    for column in series:
+        scale = max(abs(value) for value in column) or 1
+        scaled.append([value / scale for value in column])
+
+    every = (length - 2) / (max_points - 2)
+    kept = [0]
+    anchor = 0
+    for bucket in range(max_points - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, length)
+        next_x = (end + next_end - 1) / 2
+        next_ys = [sum(column[end:next_end]) / (next_end - end) for column in scaled]
+
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            area = sum(
+                abs((anchor - next_x) * (column[index] - column[anchor]) - (anchor - index) * (next_y - column[anchor]))
+                for column, next_y in zip(scaled, next_ys)
+            )
+            if area > best_area:
+                best, best_area = index, area
+        kept.append(best)
+        anchor = best
+    kept.append(length - 1)
+    return kept
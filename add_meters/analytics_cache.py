@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSION_KEY = 'meters:data-version:{user_id}'
+VALUE_KEY = 'meters:{name}:{user_id}:{period}:v{version}'
+
+
+def _fresh_version():
+    # Seeded from the clock, so a version key that was evicted restarts above every version
+    # handed out before (bumps are far rarer than nanoseconds) and old entries stay unreachable.
+    return time.time_ns()
+
+
+def get_data_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key) or _fresh_version()
+    return version
+
+
+def bump_data_version(user_id):
+    """Invalidate every cached analytics value of the user by moving to a new version."""
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _fresh_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def cached_analytics(user_id, name, period, builder):
+    key = VALUE_KEY.format(name=name, user_id=user_id, period=period, version=get_data_version(user_id))
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout=settings.ANALYTICS_CACHE_TIMEOUT)
+    return value
+
+
+def fragment_cache_context(user_id):
+    """Context for ``{% cache fragment_cache_timeout <name> user.pk data_version %}`` blocks."""
+    return {
+        'data_version': get_data_version(user_id),
+        'fragment_cache_timeout': settings.TEMPLATE_FRAGMENT_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,270 @@
+import math
+from collections import defaultdict
+from statistics import median
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AnomalyState, MeterReading
+
+
+# Consecutive high readings after which a spike is reported as a possible leak.
+LEAK_RUN = 3
+DEFAULT_DETECTORS = (
+    'add_meters.anomalies.RollingMedianDetector',
+    'add_meters.anomalies.SeasonalDetector',
+    'add_meters.anomalies.EWMADetector',
+)
+# Readings closer together than this are rated as if this much time had passed.
+MIN_ELAPSED_DAYS = 1 / 24
+
+
+class RollingMedianDetector:
+    """Robust z-score of the consumption rate against the median/MAD of the last ``window`` rates."""
+
+    name = 'mad'
+
+    def __init__(self, window=30, threshold=3.5, min_history=8):
+        self.window = window
+        self.threshold = threshold
+        self.min_history = min_history
+
+    def initial_state(self):
+        return {'window': []}
+
+    def classify(self, state, rate, day):
+        window = state['window']
+        if len(window) < self.min_history:
+            return None
+        center = median(window)
+        # 1.4826 scales the MAD to a standard deviation for normally distributed data.
+        scale = 1.4826 * median([abs(value - center) for value in window]) or max(abs(center) * 0.1, 1)
+        score = (rate - center) / scale
+        return _vote(score, self.threshold), score
+
+    def update(self, state, rate, day, elapsed_days):
+        state['window'] = (state['window'] + [rate])[-self.window:]
+
+
+class SeasonalDetector:
+    """Compares the rate with the average rate of the same calendar month one year earlier."""
+
+    name = 'seasonal'
+
+    def __init__(self, high_ratio=1.5, low_ratio=0.7, min_days=7):
+        self.high_ratio = high_ratio
+        self.low_ratio = low_ratio
+        self.min_days = min_days
+
+    def initial_state(self):
+        return {'months': {}}
+
+    @staticmethod
+    def _month(day, years_back=0):
+        return f'{day.year - years_back:04d}-{day.month:02d}'
+
+    def classify(self, state, rate, day):
+        consumption, days = state['months'].get(self._month(day, years_back=1), (0, 0))
+        if days < self.min_days or consumption <= 0:
+            return None
+        ratio = rate / (consumption / days)
+        if ratio > self.high_ratio:
+            return 'high', ratio
+        if ratio < self.low_ratio:
+            return 'low', ratio
+        return 'normal', ratio
+
+    def update(self, state, rate, day, elapsed_days):
+        months = state['months']
+        key = self._month(day)
+        consumption, days = months.get(key, (0, 0))
+        months[key] = (consumption + rate * elapsed_days, days + elapsed_days)
+        # Thirteen months are enough to look up the same month last year.
+        for old in sorted(months)[:-13]:
+            del months[old]
+
+
+class EWMADetector:
+    """z-score of the rate against an exponentially weighted mean and variance."""
+
+    name = 'ewma'
+
+    def __init__(self, alpha=0.2, threshold=3.0, min_history=8):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_history = min_history
+
+    def initial_state(self):
+        return {'mean': 0.0, 'var': 0.0, 'n': 0}
+
+    def classify(self, state, rate, day):
+        if state['n'] < self.min_history:
+            return None
+        std = math.sqrt(state['var']) or max(abs(state['mean']) * 0.1, 1)
+        score = (rate - state['mean']) / std
+        return _vote(score, self.threshold), score
+
+    def update(self, state, rate, day, elapsed_days):
+        if state['n'] == 0:
+            state['mean'] = rate
+        else:
+            diff = rate - state['mean']
+            state['mean'] += self.alpha * diff
+            state['var'] = (1 - self.alpha) * (state['var'] + self.alpha * diff * diff)
+        state['n'] += 1
+
+
+def _vote(score, threshold):
+    if score > threshold:
+        return 'high'
+    if score < -threshold:
+        return 'low'
+    return 'normal'
+
+
+def get_detectors():
+    paths = getattr(settings, 'ANOMALY_DETECTORS', DEFAULT_DETECTORS)
+    return [import_string(path)() for path in paths]
+
+
+class AnomalyEngine:
+    """Classifies each new reading of a meter from a small running state, in O(1) per reading.
+
+    A reading is high or low when at least half of the detectors past their warm-up agree;
+    while none of them is ready the status stays empty and callers fall back to fixed thresholds.
+    """
+
+    def __init__(self, detectors=None):
+        self.detectors = get_detectors() if detectors is None else detectors
+        self.tz = timezone.get_current_timezone()
+
+    def observe(self, anomaly_state, created, value):
+        state = anomaly_state.state
+        detector_states = state.setdefault('detectors', {})
+        for detector in self.detectors:
+            detector_states.setdefault(detector.name, detector.initial_state())
+
+        if anomaly_state.last_created is None:
+            anomaly_state.last_created, anomaly_state.last_value = created, value
+            anomaly_state.readings = 1
+            return anomaly_state
+
+        delta = value - anomaly_state.last_value
+        elapsed_days = max((created - anomaly_state.last_created).total_seconds() / 86400, MIN_ELAPSED_DAYS)
+        rate = delta / elapsed_days
+        day = created.astimezone(self.tz).date()
+
+        votes = []
+        score = None
+        for detector in self.detectors:
+            result = detector.classify(detector_states[detector.name], rate, day)
+            if result is not None:
+                votes.append(result[0])
+                score = result[1] if score is None else score
+
+        status = ''
+        if delta < 0:
+            status = AnomalyState.DECREASE
+        elif votes:
+            if votes.count('high') * 2 >= len(votes):
+                status = AnomalyState.HIGH
+            elif votes.count('low') * 2 >= len(votes):
+                status = AnomalyState.LOW
+            else:
+                status = AnomalyState.NORMAL
+        anomaly_state.high_run = anomaly_state.high_run + 1 if status == AnomalyState.HIGH else 0
+        if anomaly_state.high_run >= LEAK_RUN:
+            status = AnomalyState.LEAK
+
+        # Decreases are data errors, not consumption; keep them out of the baselines.
+        if delta >= 0:
+            for detector in self.detectors:
+                detector.update(detector_states[detector.name], rate, day, elapsed_days)
+
+        anomaly_state.status, anomaly_state.score = status, score
+        anomaly_state.last_created, anomaly_state.last_value = created, value
+        anomaly_state.readings += 1
+        return anomaly_state
+
+
+def _save_states(states):
+    new = [item for item in states if item.pk is None]
+    existing = [item for item in states if item.pk is not None]
+    AnomalyState.objects.bulk_create(new)
+    AnomalyState.objects.bulk_update(
+        existing, ['readings', 'last_created', 'last_value', 'status', 'score', 'high_run', 'state', 'updated'],
+    )
+
+
+def rebuild_anomaly_states(meter_ids, engine=None):
+    """Replay the full history of ``meter_ids`` into fresh anomaly states; returns the states."""
+    engine = engine or AnomalyEngine()
+    meter_ids = list(meter_ids)
+    existing = {item.meter_id: item for item in AnomalyState.objects.filter(meter_id__in=meter_ids)}
+    states = {}
+    rows = (
+        MeterReading.objects.filter(meter_id__in=meter_ids)
+        .order_by('meter_id', 'created', 'id')
+        .values_list('meter_id', 'created', 'value')
+    )
+    for meter_id, created, value in rows.iterator():
+        anomaly_state = states.get(meter_id)
+        if anomaly_state is None:
+            anomaly_state = states[meter_id] = AnomalyState(meter_id=meter_id)
+            if meter_id in existing:
+                anomaly_state.pk = existing[meter_id].pk
+        engine.observe(anomaly_state, created, value)
+
+    now = timezone.now()
+    for anomaly_state in states.values():
+        anomaly_state.updated = now
+    _save_states(list(states.values()))
+    AnomalyState.objects.filter(meter_id__in=set(existing) - set(states)).delete()
+    return states
+
+
+def observe_readings(readings, engine=None):
+    """Feed newly stored MeterReading rows to the anomaly states of their meters.
+
+    Readings newer than a meter's state are applied incrementally; a meter without a
+    state, or with a reading older than its state, is rebuilt from its history.
+    """
+    engine = engine or AnomalyEngine()
+    by_meter = defaultdict(list)
+    for reading in readings:
+        by_meter[reading.meter_id].append(reading)
+    states = {item.meter_id: item for item in AnomalyState.objects.filter(meter_id__in=list(by_meter))}
+
+    stale = []
+    updated = []
+    now = timezone.now()
+    for meter_id, meter_readings in by_meter.items():
+        meter_readings.sort(key=lambda item: item.created)
+        anomaly_state = states.get(meter_id)
+        if anomaly_state is None or meter_readings[0].created <= anomaly_state.last_created:
+            stale.append(meter_id)
+            continue
+        for reading in meter_readings:
+            engine.observe(anomaly_state, reading.created, reading.value)
+        anomaly_state.updated = now
+        updated.append(anomaly_state)
+
+    _save_states(updated)
+    if stale:
+        rebuild_anomaly_states(stale, engine=engine)
+
+
+def reset_anomaly_states(meter_ids=None, user_id=None):
+    """Drop states whose history changed; they are rebuilt on the next reading or report run."""
+    states = AnomalyState.objects.all()
+    if meter_ids is not None:
+        states = states.filter(meter_id__in=list(meter_ids))
+    if user_id is not None:
+        states = states.filter(meter__user_id=user_id)
+    states.delete()
+
+
+def statuses_as_of(states, as_of):
+    """Return ``{position: AnomalyState}`` for the ``states`` that already include the reading at ``as_of``."""
+    return {item.meter.position: item for item in states if item.status and item.last_created == as_of}
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AddMetersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'add_meters'
+
+    def ready(self):
+        from . import signals  # noqa: F401
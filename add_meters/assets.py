@@ -0,0 +1,64 @@
+"""Third-party browser assets served from our own static files.
+
+The files are committed under ``add_meters/static/`` and can be fetched again (and
+checked against their pinned hash) with ``python manage.py vendor_assets``. If a
+file is missing, pages fall back to its CDN URL.
+"""
+import base64
+import functools
+import hashlib
+from dataclasses import dataclass
+
+from django.contrib.staticfiles import finders
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.templatetags.static import static
+
+
+@dataclass(frozen=True)
+class VendorAsset:
+    path: str
+    cdn_url: str
+    # Subresource Integrity hash of the pinned release; empty when it has not been pinned yet.
+    integrity: str = ''
+
+
+VENDOR_ASSETS = {
+    'bootstrap-css': VendorAsset(
+        'add_meters/vendor/bootstrap-5.3.3/bootstrap.min.css',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css',
+        'sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH',
+    ),
+    'bootstrap-js': VendorAsset(
+        'add_meters/vendor/bootstrap-5.3.3/bootstrap.bundle.min.js',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js',
+        'sha384-YvpcrYf0tY3lHB60NNkmXc5s9fDVZLESaAA55NDzOxhy9GkcIdslK1eN7N6jIeHz',
+    ),
+    'chartjs': VendorAsset(
+        'add_meters/vendor/chart.js-4.4.0/chart.umd.js',
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js',
+        'sha384-pDFoJfgzrYgHITK5uWaYUTiW+G7S1+HWvC3LuNhCalTFtF/zZXa80CCKSuk91czS',
+    ),
+}
+
+
+def subresource_integrity(content):
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+
+@functools.cache
+def asset_url(name):
+    """Return ``(url, is_local)`` for the asset: its static URL once vendored, else the CDN URL.
+
+    Resolved once per process; the finders walk the static directories on every call.
+    """
+    asset = VENDOR_ASSETS[name]
+    if finders.find(asset.path):
+        return static(asset.path), True
+    return asset.cdn_url, False
+
+
+@receiver(setting_changed)
+def clear_asset_urls(setting, **kwargs):
+    if setting in ('STATIC_URL', 'STATICFILES_DIRS', 'STATICFILES_FINDERS', 'STORAGES', 'INSTALLED_APPS'):
+        asset_url.cache_clear()
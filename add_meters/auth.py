@@ -0,0 +1,36 @@
+"""Authentication backend that keeps recently seen users in the cache.
+
+``AuthenticationMiddleware`` loads the user on every request; with this backend a warm
+request needs no ``auth_user`` query. Cached users expire after ``AUTH_USER_CACHE_TIMEOUT``
+seconds and are dropped whenever the user row is saved or deleted.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+USER_KEY = 'meters:auth-user:{user_id}'
+
+
+def forget_cached_user(user_id):
+    cache.delete(USER_KEY.format(user_id=user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id=user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        key = USER_KEY.format(user_id=user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .anomalies import statuses_as_of
+from .models import AddMeterData, Profile
+from .series import aload_user_series, load_user_series
+
+
+class DashboardData:
+    """Everything the profile dashboard shows: the latest readings and the recent series of every meter.
+
+    The recent readings are read with the user's profile in one query, and the series with
+    the meters' anomaly statuses in a second one, only when the summaries are not cached.
+    """
+
+    def __init__(self, user, recent_count=5, window_days=30, now=None):
+        self.user = user
+        self.recent_count = recent_count
+        self.window_start = (now or timezone.now()) - timedelta(days=window_days)
+        self.profile = None
+        self.recent_records = []
+        # Only filled by ``aload``; the sync view reads them lazily on a cache miss.
+        self.series = None
+        self.statuses = None
+
+    @property
+    def last_record(self):
+        return self.recent_records[0] if len(self.recent_records) > 0 else None
+
+    @property
+    def prev_record(self):
+        return self.recent_records[1] if len(self.recent_records) > 1 else None
+
+    @property
+    def series_start(self):
+        # The difference rows also need the previous reading when it is older than the window.
+        if self.prev_record is not None:
+            return min(self.window_start, self.prev_record.created)
+        return self.window_start
+
+    def _readings(self):
+        return (
+            AddMeterData.objects.filter(user=self.user)
+            .select_related('user__profile')
+            .order_by('-created')[:self.recent_count]
+        )
+
+    def _set_records(self, records):
+        self.recent_records = records
+        if records:
+            # A user without a profile gets None from the join instead of a query.
+            self.profile = getattr(records[0].user, 'profile', None)
+
+    def _set_series(self, series):
+        self.series = series
+        if self.last_record is not None:
+            self.statuses = statuses_as_of([item.anomaly for item in series if item.anomaly], self.last_record.created)
+
+    def load(self):
+        self._set_records(list(self._readings()))
+        if not self.recent_records:
+            self.profile = Profile.objects.filter(user=self.user).first()
+        return self
+
+    def get_series(self):
+        if self.series is None:
+            self._set_series(load_user_series(self.user, since=self.series_start, with_anomalies=True))
+        return self.series
+
+    def get_statuses(self):
+        self.get_series()
+        return self.statuses
+
+    async def aload(self):
+        """Async version of ``load`` that also reads the series and anomaly statuses."""
+        self._set_records([item async for item in self._readings()])
+        if not self.recent_records:
+            self.profile = await Profile.objects.filter(user=self.user).afirst()
+        self._set_series(await aload_user_series(self.user, since=self.series_start, with_anomalies=True))
+        return self
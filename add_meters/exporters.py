@@ -0,0 +1,58 @@
+import csv
+import json
+
+from .validation import METER_FIELDS
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+DELTA_FIELDS = tuple(f'delta_{key}' for key in METER_FIELDS)
+EXPORT_COLUMNS = ('username', 'created', *METER_FIELDS, *DELTA_FIELDS)
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class _EchoBuffer:
+    """File-like object whose write() hands the line straight back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one tuple per reading, in ``EXPORT_COLUMNS`` order, with deltas to the user's previous reading.
+
+    Rows are read with a chunked cursor, so memory use does not depend on how many
+    readings the queryset covers.
+    """
+    rows = queryset.order_by('user_id', 'created', 'id').values_list(
+        'user_id', 'user__username', 'created', *METER_FIELDS,
+    )
+    prev_user_id = None
+    prev_values = None
+    for user_id, username, created, *values in rows.iterator(chunk_size=chunk_size):
+        if user_id != prev_user_id:
+            prev_values = None
+        if prev_values is None:
+            deltas = [None] * len(values)
+        else:
+            deltas = [value - prev for value, prev in zip(values, prev_values)]
+        prev_user_id, prev_values = user_id, values
+        yield (username, created.isoformat(), *values, *deltas)
+
+
+def stream_csv(rows):
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n'
+
+
+def stream_rows(rows, fmt):
+    return stream_csv(rows) if fmt == 'csv' else stream_jsonl(rows)
@@ -1,46 +1,70 @@
 from django import forms
 
+from add_meters.meters import extra_meters_query, save_extra_readings
 from add_meters.models import AddMeterData
+from add_meters.validation import METER_FIELDS, validate_meter_values
 
 
 class BaseMeterForm(forms.ModelForm):
-    meter_fields = ('meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5')
+    meter_fields = METER_FIELDS
 
-    def __init__(self, user=None, *args, **kwargs):
+    def __init__(self, user=None, *args, latest=None, extra_meters=None, **kwargs):
         # Keep explicit user for validation and fallback to instance user in update flow.
         self.user = user or getattr(kwargs.get('instance'), 'user', None)
+        self.latest = latest
         super().__init__(*args, **kwargs)
+        # Meters beyond meter_5 (added in the admin) are stored as MeterReading rows only.
+        if extra_meters is None:
+            has_extra_meters = self.user and getattr(latest, 'has_extra_meters', True)
+            extra_meters = list(extra_meters_query(self.user, self.instance)) if has_extra_meters else []
+        self.extra_meters = extra_meters
+        for meter in self.extra_meters:
+            self.fields[f'meter_{meter.position}'] = forms.IntegerField(
+                label=meter.label, required=False, initial=getattr(meter, 'current', None),
+            )
         for field in self.fields.values():
             field.widget.attrs.update({'class': 'form-control'})
 
+    @property
+    def extra_rows(self):
+        return [(meter, self[f'meter_{meter.position}']) for meter in self.extra_meters]
+
     def clean(self):
         cleaned_data = super().clean()
-        errors = {}
-
-        for field_name in self.meter_fields:
-            value = cleaned_data.get(field_name)
-            if value is not None and value < 0:
-                errors[field_name] = 'Value must be zero or positive.'
 
-        if self.user:
+        prev_values = None
+        latest = self.latest
+        if latest is not None and latest.record_id is not None and self.instance.pk in (None, latest.record_id):
+            # The view already loaded the user's LatestReading; reuse it instead of querying again.
+            prev_record = latest.previous if self.instance.pk else latest.record
+            prev_values = {key: getattr(prev_record, key) for key in self.meter_fields} if prev_record else None
+        elif self.user:
             prev_qs = AddMeterData.objects.filter(user=self.user).order_by('-created')
             if self.instance and self.instance.pk:
                 prev_qs = prev_qs.exclude(pk=self.instance.pk)
-            prev_data = prev_qs.first()
-
-            if prev_data:
-                for i in range(1, 6):
-                    field_name = f'meter_{i}'
-                    prev_meter = getattr(prev_data, field_name)
-                    new_meter = cleaned_data.get(field_name)
-                    if new_meter is not None and new_meter < prev_meter:
-                        errors[field_name] = f'Meter {i} must be greater than or equal to {prev_meter}.'
+            prev_values = prev_qs.values(*self.meter_fields).first()
 
+        errors = validate_meter_values(cleaned_data, prev_values)
+        for meter in self.extra_meters:
+            name = f'meter_{meter.position}'
+            value = cleaned_data.get(name)
+            if value is not None and value < 0:
+                errors[name] = 'Value must be zero or positive.'
+            elif value is not None and meter.previous is not None and value < meter.previous:
+                errors[name] = f'{meter.label} must be greater than or equal to {meter.previous}.'
         if errors:
             raise forms.ValidationError(errors)
 
         return cleaned_data
 
+    def save(self, commit=True):
+        created = self.instance.pk is None
+        record = super().save(commit=commit)
+        if commit:
+            values = {meter: self.cleaned_data.get(f'meter_{meter.position}') for meter in self.extra_meters}
+            save_extra_readings(record, values, created=created)
+        return record
+
 
 class AddMeterForm(BaseMeterForm):
     class Meta:
@@ -52,3 +76,19 @@ class AddMeterUpdateForm(BaseMeterForm):
     class Meta:
         model = AddMeterData
         fields = ('meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5')
+
+
+class ReadingImportForm(forms.Form):
+    FORMAT_CHOICES = (
+        ('', 'Detect from file name'),
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    )
+
+    file = forms.FileField(help_text='Columns: created, meter_1, meter_2, meter_3, meter_4, meter_5.')
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['file'].widget.attrs.update({'class': 'form-control'})
+        self.fields['format'].widget.attrs.update({'class': 'form-select'})
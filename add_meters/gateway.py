@@ -0,0 +1,152 @@
+import hashlib
+import secrets
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .importers import RowError, parse_created, refresh_after_bulk_insert
+from .latest import StaleReadingError, claim_latest_reading
+from .meters import mirror_readings
+from .models import AddMeterData, GatewayToken, LatestReading, Profile
+from .validation import METER_FIELDS, validate_meter_values
+
+
+MAX_BATCH_SIZE = 1000
+APARTMENT_FIELDS = ('city', 'street', 'building', 'apartment')
+
+
+def hash_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_gateway_token(name, **scope):
+    """Create a token and return ``(token, key)``; the plain key is not stored anywhere."""
+    key = secrets.token_urlsafe(32)
+    token = GatewayToken.objects.create(name=name, key_hash=hash_key(key), **scope)
+    return token, key
+
+
+def authenticate_gateway(request):
+    header = request.headers.get('Authorization', '')
+    scheme, _, key = header.partition(' ')
+    if scheme.lower() != 'bearer' or not key.strip():
+        return None
+    token = GatewayToken.objects.filter(key_hash=hash_key(key.strip()), is_active=True).first()
+    if token is not None:
+        GatewayToken.objects.filter(pk=token.pk).update(last_used=timezone.now())
+    return token
+
+
+def _apartment_key(values):
+    return tuple(str(values.get(field, '')).strip() for field in APARTMENT_FIELDS)
+
+
+def resolve_users(token, items):
+    """Map usernames and apartment keys used by ``items`` to user ids, in one query.
+
+    Only profiles inside the token's scope are visible to the gateway.
+    """
+    usernames = {item['username'] for item in items if isinstance(item.get('username'), str)}
+    apartments = {_apartment_key(item['apartment']) for item in items if isinstance(item.get('apartment'), dict)}
+
+    lookup = Q(user__username__in=usernames)
+    for city, street, building, apartment in apartments:
+        if apartment.isdigit():
+            lookup |= Q(city=city, street=street, building=building, apartment=int(apartment))
+    scope = {field: getattr(token, field) for field in ('city', 'street', 'building') if getattr(token, field)}
+
+    by_username, by_apartment = {}, {}
+    rows = Profile.objects.filter(lookup, **scope).values_list('user_id', 'user__username', *APARTMENT_FIELDS)
+    for user_id, username, *apartment in rows:
+        by_username[username] = user_id
+        by_apartment[_apartment_key(dict(zip(APARTMENT_FIELDS, apartment)))] = user_id
+    return by_username, by_apartment
+
+
+def _parse_item(item):
+    created = timezone.now() if item.get('created') in (None, '') else parse_created(item['created'])
+    values = {}
+    for i, field_name in enumerate(METER_FIELDS, start=1):
+        value = item.get(field_name)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise RowError(f'Meter {i} must be an integer.')
+        values[field_name] = value
+    return created, values
+
+
+def submit_readings(token, items):
+    """Validate and store a gateway batch; returns one result dict per item, in input order.
+
+    Items are grouped per user and checked with the rules of ``BaseMeterForm`` against
+    the user's latest stored reading (one LatestReading query for the whole batch) and the
+    preceding items of the same user. Accepted readings are written with ``bulk_create``.
+    """
+    results = [None] * len(items)
+
+    def reject(index, message):
+        results[index] = {'index': index, 'status': 'rejected', 'error': message}
+
+    by_username, by_apartment = resolve_users(token, [item for item in items if isinstance(item, dict)])
+    per_user = defaultdict(list)
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            reject(index, 'Each reading must be a JSON object.')
+            continue
+        if isinstance(item.get('apartment'), dict):
+            user_id = by_apartment.get(_apartment_key(item['apartment']))
+        else:
+            user_id = by_username.get(item.get('username'))
+        if user_id is None:
+            reject(index, 'Unknown user or apartment.')
+            continue
+        try:
+            created, values = _parse_item(item)
+        except RowError as exc:
+            reject(index, str(exc))
+            continue
+        per_user[user_id].append((created, index, values))
+
+    latest_by_user = {
+        latest.user_id: latest
+        for latest in LatestReading.objects.filter(user_id__in=list(per_user)).select_related('record')
+    }
+
+    accepted = defaultdict(list)
+    for user_id, user_items in per_user.items():
+        latest = latest_by_user.get(user_id)
+        prev_record = latest.record if latest else None
+        prev_created = prev_record.created if prev_record else None
+        prev_values = {key: getattr(prev_record, key) for key in METER_FIELDS} if prev_record else None
+        for created, index, values in sorted(user_items, key=lambda entry: entry[:2]):
+            if prev_created is not None and created <= prev_created:
+                reject(index, 'Readings must be newer than the previous reading.')
+                continue
+            errors = validate_meter_values(values, prev_values)
+            if errors:
+                reject(index, ' '.join(errors.values()))
+                continue
+            accepted[user_id].append((index, AddMeterData(user_id=user_id, created=created, **values)))
+            prev_created, prev_values = created, values
+
+    users = get_user_model().objects.in_bulk(list(accepted))
+    with transaction.atomic():
+        for user_id in list(accepted):
+            try:
+                claim_latest_reading(users[user_id], latest_by_user.get(user_id))
+            except StaleReadingError:
+                for index, _ in accepted.pop(user_id):
+                    reject(index, 'Another reading was saved in the meantime; resubmit this reading.')
+        records = [record for user_items in accepted.values() for _, record in user_items]
+        AddMeterData.objects.bulk_create(records)
+        mirror_readings(records, created=True)
+        # Commit the claimed LatestReading together with the record it now points at.
+        for user_id, user_items in accepted.items():
+            refresh_after_bulk_insert(users[user_id], since=user_items[0][1].created)
+
+    for user_items in accepted.values():
+        for index, record in user_items:
+            results[index] = {'index': index, 'status': 'created', 'id': record.pk}
+    return results
@@ -0,0 +1,171 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .analytics_cache import bump_data_version
+from .latest import StaleReadingError, claim_latest_reading, get_latest_reading, refresh_latest_reading
+from .meters import mirror_readings
+from .models import AddMeterData
+from .rollups import refresh_rollups
+from .validation import METER_FIELDS, validate_meter_values
+
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 2000
+# How far ahead of the server clock a reading's ``created`` may be.
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        self.errors.append((line, message))
+
+
+def guess_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def iter_raw_rows(lines, fmt):
+    """Yield ``(line_number, mapping_or_error)`` while reading ``lines`` lazily."""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, RowError('Invalid JSON.')
+            continue
+        if not isinstance(row, dict):
+            row = RowError('Each line must be a JSON object.')
+        yield line_number, row
+
+
+def parse_created(value):
+    parsed = None
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                day = parse_date(value)
+                parsed = datetime.combine(day, time.min) if day else None
+        except ValueError:
+            # Well-formed but not a calendar date, e.g. 2026-02-30.
+            parsed = None
+    if parsed is None:
+        raise RowError('"created" must be an ISO date or datetime.')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    # A future reading would become the latest one and block every real reading until then.
+    if parsed > timezone.now() + MAX_CLOCK_SKEW:
+        raise RowError('"created" must not be in the future.')
+    return parsed
+
+
+def parse_row(row):
+    created = parse_created(row.get('created'))
+    values = {}
+    for i, field_name in enumerate(METER_FIELDS, start=1):
+        try:
+            values[field_name] = int(row[field_name])
+        except (KeyError, TypeError, ValueError):
+            raise RowError(f'Meter {i} must be an integer.') from None
+    return created, values
+
+
+def import_readings(user, lines, fmt='csv', batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Validate and insert readings for ``user`` from an iterable of text lines.
+
+    Rows must be in chronological order and newer than the user's latest stored reading.
+    Each row is checked against the previous accepted row with the same rules as
+    ``BaseMeterForm``; invalid rows are skipped and reported, valid ones are written
+    with ``bulk_create`` one transaction per batch. Every batch claims the user's
+    ``LatestReading`` like a form submission and refreshes the derived data in the same
+    transaction, so an interrupted import leaves consistent state behind. If another
+    reading is saved meanwhile, the import stops at that batch. ``progress(result)`` is
+    called after every batch.
+    """
+    result = ImportResult()
+    latest = get_latest_reading(user)
+    prev_record = latest.record if latest else None
+    prev_created = prev_record.created if prev_record else None
+    prev_values = {key: getattr(prev_record, key) for key in METER_FIELDS} if prev_record else None
+    batch = []
+    batch_lines = []
+
+    def flush():
+        nonlocal latest
+        try:
+            with transaction.atomic():
+                claim_latest_reading(user, latest)
+                AddMeterData.objects.bulk_create(batch)
+                mirror_readings(batch, created=True)
+                refresh_after_bulk_insert(user, since=batch[0].created)
+                latest = get_latest_reading(user)
+        except StaleReadingError:
+            for line_number in batch_lines:
+                result.add_error(line_number, 'Another reading was saved during the import; this row was not imported.')
+            return False
+        result.created += len(batch)
+        batch.clear()
+        batch_lines.clear()
+        if progress:
+            progress(result)
+        return True
+
+    for line_number, row in iter_raw_rows(lines, fmt):
+        if isinstance(row, RowError):
+            result.add_error(line_number, str(row))
+            continue
+        try:
+            created, values = parse_row(row)
+        except RowError as exc:
+            result.add_error(line_number, str(exc))
+            continue
+
+        if prev_created is not None and created <= prev_created:
+            result.add_error(line_number, 'Readings must be newer than the previous reading.')
+            continue
+        errors = validate_meter_values(values, prev_values)
+        if errors:
+            result.add_error(line_number, ' '.join(errors.values()))
+            continue
+
+        batch.append(AddMeterData(user=user, created=created, **values))
+        batch_lines.append(line_number)
+        prev_created, prev_values = created, values
+        if len(batch) >= batch_size and not flush():
+            return result
+
+    if batch:
+        flush()
+    return result
+
+
+def refresh_after_bulk_insert(user, since):
+    """Update what post_save would have for readings of ``user`` bulk-inserted at or after ``since``."""
+    refresh_rollups(user, since=since)
+    refresh_latest_reading(user.pk)
+    # Bump after commit so readers cannot cache pre-commit data under the new version.
+    transaction.on_commit(lambda: bump_data_version(user.pk))
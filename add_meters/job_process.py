@@ -0,0 +1,20 @@
+"""Entry point of job worker processes.
+
+Kept free of model imports: a spawned child unpickles its target before Django is set up.
+"""
+
+
+def run_in_child(job_id, database_name, media_root):
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connections
+
+    from .jobs import run_job
+
+    # Follow the parent's database and media directory in case they were changed at runtime.
+    connections['default'].settings_dict['NAME'] = database_name
+    settings.MEDIA_ROOT = media_root
+    run_job(job_id)
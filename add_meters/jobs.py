@@ -0,0 +1,219 @@
+"""Database-backed background jobs: no broker, works on SQLite and PostgreSQL.
+
+Views enqueue a ``Job`` row; ``manage.py run_jobs`` claims queued jobs with a
+compare-and-swap update and runs each in its own process, at most ``processes`` at
+a time, so heavy work uses several cores and a job that overruns ``JOB_TIMEOUT``
+can be killed. Failed jobs are retried with exponential backoff up to the job's
+``max_attempts``; ``JobError`` marks a failure that retrying cannot fix.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from .exporters import iter_export_rows, stream_rows
+from .importers import import_readings
+from .job_process import run_in_child
+from .models import AddMeterData, Job
+from .reports import build_consumption_report
+
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 5
+EXPORT_PROGRESS_EVERY = 5000
+
+
+class JobError(Exception):
+    """A permanent failure; the message is shown to the user."""
+
+
+def run_import_job(job, report):
+    size = job.input_file.size or 1
+    try:
+        with job.input_file.open('rb') as raw:
+            lines = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+            result = import_readings(
+                job.user, lines, fmt=job.params['format'],
+                progress=lambda result: report(raw.tell(), size, f'Imported {result.created} readings'),
+            )
+    except UnicodeDecodeError:
+        raise JobError('The file must be UTF-8 encoded text.') from None
+    finally:
+        job.input_file.delete(save=False)
+        job.save(update_fields=['input_file'])
+    return {
+        'created': result.created,
+        'skipped': result.skipped,
+        'errors': result.errors[:MAX_REPORTED_ERRORS],
+    }
+
+
+def run_export_job(job, report):
+    fmt, scope = job.params['format'], job.params['scope']
+    queryset = AddMeterData.objects.all()
+    if scope != 'all':
+        queryset = queryset.filter(user=job.user)
+    total = queryset.count()
+
+    def counted(rows):
+        for index, row in enumerate(rows, start=1):
+            if index % EXPORT_PROGRESS_EVERY == 0:
+                report(index, total, f'Exported {index} of {total} readings')
+            yield row
+
+    filename = f'meter-readings-{scope}-{timezone.localdate():%Y%m%d}.{fmt}'
+    with tempfile.TemporaryFile() as output:
+        for chunk in stream_rows(counted(iter_export_rows(queryset)), fmt):
+            output.write(chunk.encode())
+        output.seek(0)
+        job.result_file.save(filename, File(output), save=False)
+    return {'rows': total, 'filename': filename}
+
+
+def run_report_job(job, report):
+    return build_consumption_report(job.params['group'], job.params['months'])
+
+
+# kind: (handler, max_attempts). Imports are not retried: batches committed before a
+# failure would be rejected as duplicates on the second attempt.
+JOB_KINDS = {
+    'import': (run_import_job, 1),
+    'export': (run_export_job, 3),
+    'report': (run_report_job, 3),
+}
+
+
+def enqueue_job(kind, user, params=None, input_file=None):
+    return Job.objects.create(
+        kind=kind, user=user, params=params or {}, input_file=input_file or '', max_attempts=JOB_KINDS[kind][1],
+    )
+
+
+def claim_next_job(worker_name):
+    """Mark the oldest due job as running for ``worker_name`` and return it, or None."""
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by('run_after', 'pk')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, started=now, attempts=F('attempts') + 1, worker=worker_name, message='',
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def fail_or_retry(job_id, error, permanent=False):
+    job = Job.objects.only('attempts', 'max_attempts').get(pk=job_id)
+    if permanent or job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job_id).update(status=Job.FAILED, finished=timezone.now(), message=error[:255])
+        return
+    delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+    Job.objects.filter(pk=job_id).update(
+        status=Job.QUEUED,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        worker='',
+        message=f'Attempt {job.attempts} failed: {error}'[:255],
+    )
+
+
+def run_job(job_id):
+    """Run a claimed job in the current process and record its outcome."""
+    job = Job.objects.select_related('user').get(pk=job_id)
+
+    def report(done, total, message=''):
+        progress = min(99, done * 100 // total) if total else 0
+        Job.objects.filter(pk=job_id).update(progress=progress, message=message[:255])
+
+    try:
+        result = JOB_KINDS[job.kind][0](job, report)
+    except JobError as exc:
+        fail_or_retry(job_id, str(exc), permanent=True)
+        return
+    except Exception as exc:
+        logger.exception('Job %s failed', job_id)
+        fail_or_retry(job_id, f'{type(exc).__name__}: {exc}')
+        return
+
+    job.status = Job.DONE
+    job.progress = 100
+    job.message = ''
+    job.result = result
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'progress', 'message', 'result', 'result_file', 'finished'])
+
+
+def requeue_stale_jobs(timeout):
+    """Fail or retry jobs left running by a worker that died; returns how many were found."""
+    stale = Job.objects.filter(status=Job.RUNNING, started__lt=timezone.now() - timedelta(seconds=timeout))
+    job_ids = list(stale.values_list('pk', flat=True))
+    for job_id in job_ids:
+        fail_or_retry(job_id, 'The worker stopped while the job was running.')
+    return len(job_ids)
+
+
+class Worker:
+    """Claims and runs jobs; ``processes=0`` runs them one by one in this process, without timeouts."""
+
+    def __init__(self, processes=None, timeout=None, poll_interval=1.0, name=None):
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.timeout = settings.JOB_TIMEOUT if timeout is None else timeout
+        self.poll_interval = poll_interval
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.context = multiprocessing.get_context('spawn')
+        self.running = {}
+
+    def run(self, burst=False):
+        """Process jobs until stopped; with ``burst`` return once the queue is empty. Returns the job count."""
+        requeue_stale_jobs(self.timeout)
+        handled = 0
+        while True:
+            self.reap()
+            job = claim_next_job(self.name) if len(self.running) < max(self.processes, 1) else None
+            if job is not None:
+                handled += 1
+                self.start(job)
+                continue
+            if burst and not self.running:
+                return handled
+            time.sleep(self.poll_interval if not self.running else min(self.poll_interval, 0.1))
+
+    def start(self, job):
+        if not self.processes:
+            run_job(job.pk)
+            return
+        connection = connections['default']
+        process = self.context.Process(
+            target=run_in_child, args=(job.pk, connection.settings_dict['NAME'], str(settings.MEDIA_ROOT)),
+            daemon=True,
+        )
+        process.start()
+        self.running[job.pk] = (process, time.monotonic())
+
+    def reap(self):
+        for job_id, (process, started) in list(self.running.items()):
+            if process.is_alive():
+                if time.monotonic() - started <= self.timeout:
+                    continue
+                process.terminate()
+                process.join()
+                fail_or_retry(job_id, f'Timed out after {self.timeout:g} seconds.')
+            else:
+                process.join()
+                if Job.objects.filter(pk=job_id, status=Job.RUNNING).exists():
+                    fail_or_retry(job_id, f'The job process exited with code {process.exitcode}.')
+            del self.running[job_id]
@@ -0,0 +1,60 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+
+from .models import AddMeterData, LatestReading, Meter
+from .validation import METER_FIELDS
+
+
+class StaleReadingError(Exception):
+    """Another reading was saved for the user after the submitted form was validated."""
+
+
+def _latest_readings(user):
+    # Lets the reading form skip its extra meter query for users without extra meters.
+    extra_meters = Meter.objects.filter(user=OuterRef('user'), position__gt=len(METER_FIELDS))
+    return (
+        LatestReading.objects.select_related('record', 'previous')
+        .annotate(has_extra_meters=Exists(extra_meters))
+        .filter(user=user)
+    )
+
+
+def get_latest_reading(user):
+    return _latest_readings(user).first()
+
+
+async def aget_latest_reading(user):
+    return await _latest_readings(user).afirst()
+
+
+def claim_latest_reading(user, latest):
+    """Guard a submission validated against ``latest``; call inside the transaction that saves it.
+
+    The conditional version bump (or the insert of the first row) only succeeds for one
+    of several concurrent submissions and holds the row lock until commit; the others
+    raise ``StaleReadingError`` and have to be validated again.
+    """
+    if latest is None:
+        try:
+            with transaction.atomic():
+                LatestReading.objects.create(user=user, version=1)
+        except IntegrityError:
+            raise StaleReadingError from None
+        return
+    claimed = LatestReading.objects.filter(pk=latest.pk, version=latest.version).update(version=F('version') + 1)
+    if not claimed:
+        raise StaleReadingError
+
+
+def refresh_latest_reading(user_id):
+    records = list(AddMeterData.objects.filter(user_id=user_id).order_by('-created', '-id').values_list('pk', flat=True)[:2])
+    if not records:
+        LatestReading.objects.filter(user_id=user_id).delete()
+        return
+    records.append(None)
+    # Bumping the version here too makes submissions validated before any other write go stale.
+    updated = LatestReading.objects.filter(user_id=user_id).update(
+        record_id=records[0], previous_id=records[1], version=F('version') + 1,
+    )
+    if not updated:
+        LatestReading.objects.create(user_id=user_id, record_id=records[0], previous_id=records[1])
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from add_meters.anomalies import AnomalyEngine, rebuild_anomaly_states
+from add_meters.models import AnomalyState, Meter
+
+
+class Command(BaseCommand):
+    help = 'Report meters whose latest reading looks like a spike or a leak, across all users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Replay every meter history first instead of only meters without a state.',
+        )
+        parser.add_argument(
+            '--status', action='append', choices=[choice for choice, _ in AnomalyState.STATUS_CHOICES],
+            help='Statuses to report (repeatable). Defaults to high and leak.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Meters replayed per query.')
+
+    def handle(self, *args, **options):
+        meters = Meter.objects.order_by('pk')
+        if not options['rebuild']:
+            meters = meters.filter(anomaly_state__isnull=True, readings__isnull=False).distinct()
+        meter_ids = list(meters.values_list('pk', flat=True))
+
+        engine = AnomalyEngine()
+        batch_size = options['batch_size']
+        for start in range(0, len(meter_ids), batch_size):
+            rebuild_anomaly_states(meter_ids[start:start + batch_size], engine=engine)
+        if meter_ids:
+            self.stdout.write(f'Rebuilt anomaly state for {len(meter_ids)} meters.')
+
+        statuses = options['status'] or [AnomalyState.HIGH, AnomalyState.LEAK]
+        flagged = (
+            AnomalyState.objects.filter(status__in=statuses)
+            .select_related('meter__user')
+            .order_by('-status', 'meter__user__username', 'meter__position')
+        )
+        count = 0
+        for item in flagged.iterator():
+            count += 1
+            self.stdout.write(
+                f'{item.meter.user.username}\t{item.meter.label}\t{item.get_status_display()}\t'
+                f'{item.last_created:%Y-%m-%d %H:%M}\t{item.last_value}\tscore={item.score or 0:.2f}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{count} meters flagged.'))
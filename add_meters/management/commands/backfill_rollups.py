@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from add_meters.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily/weekly/monthly consumption rollups from the raw meter readings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='username', help='Only rebuild rollups for this username.')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(addmeterdata__isnull=False).distinct().order_by('pk')
+        if options['username']:
+            users = get_user_model().objects.filter(username=options['username'])
+            if not users.exists():
+                raise CommandError(f'User "{options["username"]}" does not exist.')
+
+        total_users = 0
+        total_buckets = 0
+        for user in users.iterator():
+            total_buckets += refresh_rollups(user)
+            total_users += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total_buckets} rollup buckets for {total_users} users.'))
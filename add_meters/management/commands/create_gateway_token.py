@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from add_meters.gateway import issue_gateway_token
+
+
+class Command(BaseCommand):
+    help = 'Create an API token for a smart-meter gateway and print its key once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Label of the gateway, e.g. its location.')
+        parser.add_argument('--city', default='', help='Only accept readings for apartments in this city.')
+        parser.add_argument('--street', default='', help='Only accept readings for apartments on this street.')
+        parser.add_argument('--building', default='', help='Only accept readings for apartments in this building.')
+
+    def handle(self, *args, **options):
+        token, key = issue_gateway_token(
+            options['name'], city=options['city'], street=options['street'], building=options['building'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Created gateway token "{token.name}" (id {token.pk}).'))
+        self.stdout.write('Store this key now, it cannot be shown again:')
+        self.stdout.write(key)
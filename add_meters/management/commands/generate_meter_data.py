@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from add_meters.synthetic import DEFAULT_BATCH_SIZE, generate_meter_data
+
+
+class Command(BaseCommand):
+    help = 'Generate users with profiles and years of synthetic, monotonically increasing meter readings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--years', type=float, default=1.0)
+        parser.add_argument('--interval-hours', type=float, default=24.0, help='Time between two readings.')
+        parser.add_argument('--prefix', default='synthetic', help='Usernames are "<prefix>-<n>".')
+        parser.add_argument('--password', default='synthetic-pass', help='Password of every generated user.')
+        parser.add_argument('--seed', type=int, help='Seed for reproducible data.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['years'] <= 0 or options['interval_hours'] <= 0:
+            raise CommandError('--users, --years and --interval-hours must be positive.')
+
+        def progress(done, readings):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{done}/{options["users"]} users, {readings} readings')
+
+        users, readings = generate_meter_data(
+            options['users'],
+            options['years'],
+            interval=timedelta(hours=options['interval_hours']),
+            prefix=options['prefix'],
+            password=options['password'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Generated {readings} readings for {users} users.'))
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from add_meters.importers import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, guess_format, import_readings
+
+
+class Command(BaseCommand):
+    help = 'Import historical meter readings for a user from a CSV or JSONL file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, default=20, help='How many row errors to print.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist.')
+
+        fmt = options['format'] or guess_format(options['path'])
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as lines:
+                result = import_readings(user, lines, fmt=fmt, batch_size=options['batch_size'])
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for line, message in result.errors[:options['max_errors']]:
+            self.stderr.write(f'line {line}: {message}')
+        self.stdout.write(self.style.SUCCESS(f'Imported {result.created} readings, skipped {result.skipped}.'))
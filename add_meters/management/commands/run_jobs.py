@@ -0,0 +1,26 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from add_meters.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (imports, exports, reports), each in its own process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='Jobs run in parallel. 0 runs them one by one in this process. Defaults to the CPU count.',
+        )
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between queue checks.')
+
+    def handle(self, *args, **options):
+        worker = Worker(processes=options['processes'], poll_interval=options['poll_interval'])
+        self.stdout.write(f'Worker {worker.name} running with {options["processes"]} processes.')
+        try:
+            handled = worker.run(burst=options['burst'])
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f'{handled} jobs processed.'))
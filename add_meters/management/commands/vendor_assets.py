@@ -0,0 +1,53 @@
+import re
+from pathlib import Path
+from urllib.parse import urljoin
+from urllib.request import urlopen
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from add_meters.assets import VENDOR_ASSETS, subresource_integrity
+
+
+SOURCE_MAP = re.compile(rb'sourceMappingURL=([\w.-]+\.map)')
+
+
+class Command(BaseCommand):
+    help = 'Download the pinned Bootstrap and Chart.js files into add_meters/static so pages work without a CDN.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f'Assets to fetch (default: all of {", ".join(VENDOR_ASSETS)}).')
+        parser.add_argument('--force', action='store_true', help='Download again even if the file exists.')
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(VENDOR_ASSETS)
+        if unknown:
+            raise CommandError(f'Unknown assets: {", ".join(sorted(unknown))}')
+
+        static_dir = Path(apps.get_app_config('add_meters').path) / 'static'
+        for name in options['names'] or VENDOR_ASSETS:
+            asset = VENDOR_ASSETS[name]
+            target = static_dir / asset.path
+            if target.exists() and not options['force']:
+                self.stdout.write(f'{name}: already vendored')
+                continue
+
+            content = self.download(asset.cdn_url)
+            integrity = subresource_integrity(content)
+            if asset.integrity and integrity != asset.integrity:
+                raise CommandError(f'{name}: downloaded file does not match the pinned hash ({integrity}).')
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+            # collectstatic fails on a source map reference whose file is missing.
+            source_map = SOURCE_MAP.search(content[-200:])
+            if source_map:
+                map_name = source_map.group(1).decode()
+                (target.parent / map_name).write_bytes(self.download(urljoin(asset.cdn_url, map_name)))
+            self.stdout.write(self.style.SUCCESS(f'{name}: saved {asset.path} ({len(content)} bytes)'))
+            if not asset.integrity:
+                self.stdout.write(f'{name}: not pinned yet, its integrity is {integrity}')
+
+    def download(self, url):
+        with urlopen(url, timeout=30) as response:
+            return response.read()
@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+from django.db.models import OuterRef, Subquery
+
+from .anomalies import observe_readings, reset_anomaly_states
+from .models import Meter, MeterReading
+from .validation import METER_FIELDS
+
+
+def ensure_default_meters(user_id):
+    """Return ``{position: meter_id}`` for the meters mirrored from AddMeterData, creating missing ones."""
+    meters = dict(
+        Meter.objects.filter(user_id=user_id, position__lte=len(METER_FIELDS)).values_list('position', 'id')
+    )
+    missing = [position for position in range(1, len(METER_FIELDS) + 1) if position not in meters]
+    if missing:
+        Meter.objects.bulk_create(
+            [Meter(user_id=user_id, position=position, label=f'Meter {position}') for position in missing],
+            ignore_conflicts=True,
+        )
+        return ensure_default_meters(user_id)
+    return meters
+
+
+def mirror_readings(records, created=False):
+    """Write the per-meter MeterReading rows for AddMeterData ``records``.
+
+    ``created=True`` skips the lookup of existing rows, for freshly inserted records.
+    """
+    by_user = defaultdict(list)
+    for record in records:
+        by_user[record.user_id].append(record)
+
+    existing = {}
+    if not created:
+        existing = {
+            (item.source_id, item.meter_id): item
+            for item in MeterReading.objects.filter(source__in=[record.pk for record in records])
+        }
+
+    to_create = []
+    to_update = []
+    for user_id, user_records in by_user.items():
+        meters = ensure_default_meters(user_id)
+        for record in user_records:
+            for position, field_name in enumerate(METER_FIELDS, start=1):
+                value = getattr(record, field_name)
+                item = existing.get((record.pk, meters[position]))
+                if item is None:
+                    to_create.append(MeterReading(
+                        meter_id=meters[position], created=record.created, value=value, source_id=record.pk,
+                    ))
+                elif item.value != value or item.created != record.created:
+                    item.value, item.created = value, record.created
+                    to_update.append(item)
+
+    MeterReading.objects.bulk_create(to_create)
+    if to_update:
+        MeterReading.objects.bulk_update(to_update, ['value', 'created'])
+        # An edited reading changes the history the running state was built from.
+        reset_anomaly_states({item.meter_id for item in to_update})
+    if to_create:
+        observe_readings(to_create)
+
+
+def extra_meters_query(user, record=None):
+    """The user's meters beyond ``meter_5`` with the value before ``record`` (and, for a saved record, its own)."""
+    readings = MeterReading.objects.filter(meter=OuterRef('pk'))
+    previous = readings.exclude(source=record) if record is not None and record.pk else readings
+    meters = Meter.objects.filter(user=user, position__gt=len(METER_FIELDS)).annotate(
+        previous=Subquery(previous.order_by('-created', '-id').values('value')[:1]),
+    )
+    if record is not None and record.pk:
+        meters = meters.annotate(current=Subquery(readings.filter(source=record).values('value')[:1]))
+    return meters.order_by('position')
+
+
+def save_extra_readings(record, values, created=False):
+    """Store the readings of meters beyond ``meter_5`` taken together with AddMeterData ``record``.
+
+    ``values`` maps Meter to value; ``None`` leaves the meter out of this reading.
+    ``created=True`` skips the lookup of existing rows, for a freshly inserted record.
+    """
+    if not values:
+        return
+    existing = {}
+    if not created:
+        existing = {item.meter_id: item for item in MeterReading.objects.filter(source=record, meter__in=list(values))}
+
+    to_create = []
+    to_update = []
+    to_delete = []
+    for meter, value in values.items():
+        item = existing.get(meter.pk)
+        if item is None:
+            if value is not None:
+                to_create.append(MeterReading(meter=meter, created=record.created, value=value, source=record))
+        elif value is None:
+            to_delete.append(item)
+        elif item.value != value:
+            item.value = value
+            to_update.append(item)
+
+    MeterReading.objects.bulk_create(to_create)
+    if to_update:
+        MeterReading.objects.bulk_update(to_update, ['value'])
+    if to_delete:
+        MeterReading.objects.filter(pk__in=[item.pk for item in to_delete]).delete()
+    if to_update or to_delete:
+        reset_anomaly_states({item.meter_id for item in to_update + to_delete})
+    if to_create:
+        observe_readings(to_create)
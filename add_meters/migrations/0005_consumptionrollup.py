@@ -0,0 +1,34 @@
+# Generated by Django 5.2.13 on 2026-10-17 22:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0004_alter_profile_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumptionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('bucket_start', models.DateField()),
+                ('meter_1', models.IntegerField(default=0)),
+                ('meter_2', models.IntegerField(default=0)),
+                ('meter_3', models.IntegerField(default=0)),
+                ('meter_4', models.IntegerField(default=0)),
+                ('meter_5', models.IntegerField(default=0)),
+                ('readings', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumption_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'bucket_start'), name='unique_rollup_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.13 on 2026-10-17 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0005_consumptionrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='addmeterdata',
+            index=models.Index(fields=['user', 'created'], name='meterdata_user_created_idx'),
+        ),
+    ]
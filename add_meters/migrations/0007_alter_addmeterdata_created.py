@@ -0,0 +1,19 @@
+# Generated by Django 5.2.13 on 2026-10-17 22:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0006_addmeterdata_user_created_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='addmeterdata',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
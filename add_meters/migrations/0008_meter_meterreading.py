@@ -0,0 +1,49 @@
+# Generated by Django 5.2.13 on 2026-10-17 23:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0007_alter_addmeterdata_created'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Meter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('label', models.CharField(max_length=50)),
+                ('kind', models.CharField(choices=[('electricity', 'Electricity'), ('cold_water', 'Cold water'), ('hot_water', 'Hot water'), ('gas', 'Gas'), ('heat', 'Heat'), ('other', 'Other')], default='other', max_length=20)),
+                ('unit', models.CharField(blank=True, max_length=10)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('user', 'position'),
+            },
+        ),
+        migrations.CreateModel(
+            name='MeterReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('value', models.IntegerField()),
+                ('meter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='add_meters.meter')),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='meter_readings', to='add_meters.addmeterdata')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='meter',
+            constraint=models.UniqueConstraint(fields=('user', 'position'), name='unique_meter_position'),
+        ),
+        migrations.AddIndex(
+            model_name='meterreading',
+            index=models.Index(fields=['meter', 'created'], name='meterreading_meter_created_idx'),
+        ),
+    ]
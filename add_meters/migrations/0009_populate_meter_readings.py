@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+METER_FIELDS = ('meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5')
+BATCH_SIZE = 5000
+
+
+def populate_meter_readings(apps, schema_editor):
+    AddMeterData = apps.get_model('add_meters', 'AddMeterData')
+    Meter = apps.get_model('add_meters', 'Meter')
+    MeterReading = apps.get_model('add_meters', 'MeterReading')
+
+    user_ids = AddMeterData.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+    for user_id in user_ids:
+        Meter.objects.bulk_create(
+            [
+                Meter(user_id=user_id, position=position, label=f'Meter {position}')
+                for position in range(1, len(METER_FIELDS) + 1)
+            ],
+            ignore_conflicts=True,
+        )
+        meter_ids = list(
+            Meter.objects.filter(user_id=user_id, position__lte=len(METER_FIELDS))
+            .order_by('position')
+            .values_list('id', flat=True)
+        )
+
+        batch = []
+        rows = AddMeterData.objects.filter(user_id=user_id).values_list('pk', 'created', *METER_FIELDS)
+        for pk, created, *values in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.extend(
+                MeterReading(meter_id=meter_id, created=created, value=value, source_id=pk)
+                for meter_id, value in zip(meter_ids, values)
+            )
+            if len(batch) >= BATCH_SIZE:
+                MeterReading.objects.bulk_create(batch)
+                batch = []
+        MeterReading.objects.bulk_create(batch)
+
+
+def clear_meter_readings(apps, schema_editor):
+    apps.get_model('add_meters', 'Meter').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0008_meter_meterreading'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_meter_readings, clear_meter_readings),
+    ]
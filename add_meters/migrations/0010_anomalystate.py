@@ -0,0 +1,29 @@
+# Generated by Django 5.2.13 on 2026-10-17 23:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0009_populate_meter_readings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomalyState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('readings', models.PositiveIntegerField(default=0)),
+                ('last_created', models.DateTimeField(blank=True, null=True)),
+                ('last_value', models.IntegerField(blank=True, null=True)),
+                ('status', models.CharField(blank=True, choices=[('normal', 'Normal'), ('high', 'High spike'), ('low', 'Low usage'), ('decrease', 'Decrease'), ('leak', 'Possible leak')], max_length=10)),
+                ('score', models.FloatField(blank=True, null=True)),
+                ('high_run', models.PositiveSmallIntegerField(default=0)),
+                ('state', models.JSONField(default=dict)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('meter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='anomaly_state', to='add_meters.meter')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.13 on 2026-10-17 23:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0010_anomalystate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('previous', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='add_meters.addmeterdata')),
+                ('record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='add_meters.addmeterdata')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='latest_reading', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def populate_latest_readings(apps, schema_editor):
+    AddMeterData = apps.get_model('add_meters', 'AddMeterData')
+    LatestReading = apps.get_model('add_meters', 'LatestReading')
+
+    batch = []
+    user_ids = AddMeterData.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+    for user_id in user_ids:
+        records = list(
+            AddMeterData.objects.filter(user_id=user_id).order_by('-created', '-id').values_list('pk', flat=True)[:2]
+        )
+        records.append(None)
+        batch.append(LatestReading(user_id=user_id, record_id=records[0], previous_id=records[1]))
+    LatestReading.objects.bulk_create(batch, batch_size=1000)
+
+
+def clear_latest_readings(apps, schema_editor):
+    apps.get_model('add_meters', 'LatestReading').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0011_latestreading'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_latest_readings, clear_latest_readings),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.13 on 2026-10-17 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0012_populate_latest_readings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GatewayToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key_hash', models.CharField(editable=False, max_length=64, unique=True)),
+                ('city', models.CharField(blank=True, max_length=20)),
+                ('street', models.CharField(blank=True, max_length=50)),
+                ('building', models.CharField(blank=True, max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField(blank=True, editable=False, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+
+METER_FIELDS = ('meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5')
+PERIODS = ('day', 'week', 'month')
+BATCH_SIZE = 5000
+
+
+def bucket_start(day, period):
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def populate_consumption_rollups(apps, schema_editor):
+    AddMeterData = apps.get_model('add_meters', 'AddMeterData')
+    ConsumptionRollup = apps.get_model('add_meters', 'ConsumptionRollup')
+
+    # Users already covered by `backfill_rollups` or by later writes are left alone.
+    done = set(ConsumptionRollup.objects.values_list('user_id', flat=True).distinct())
+    user_ids = AddMeterData.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+    tz = timezone.get_current_timezone()
+    for user_id in user_ids:
+        if user_id in done:
+            continue
+        buckets = {}
+        prev_values = None
+        rows = AddMeterData.objects.filter(user_id=user_id).order_by('created', 'id').values_list('created', *METER_FIELDS)
+        for created, *values in rows.iterator(chunk_size=BATCH_SIZE):
+            if prev_values is not None:
+                day = created.astimezone(tz).date()
+                for period in PERIODS:
+                    start = bucket_start(day, period)
+                    bucket = buckets.get((period, start))
+                    if bucket is None:
+                        bucket = buckets[(period, start)] = ConsumptionRollup(
+                            user_id=user_id, period=period, bucket_start=start,
+                        )
+                    for key, value, prev in zip(METER_FIELDS, values, prev_values):
+                        setattr(bucket, key, getattr(bucket, key) + value - prev)
+                    bucket.readings += 1
+            prev_values = values
+        ConsumptionRollup.objects.bulk_create(buckets.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_meters', '0014_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_consumption_rollups, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 
 
 class AddMeterData(models.Model):
@@ -9,9 +10,17 @@ class AddMeterData(models.Model):
     meter_3 = models.IntegerField()
     meter_4 = models.IntegerField()
     meter_5 = models.IntegerField()
-    created = models.DateTimeField(auto_now_add=True)
+    # A default instead of auto_now_add so imported history can keep its original timestamps.
+    created = models.DateTimeField(default=timezone.now, editable=False)
     updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Ascending on purpose: SQLite and PostgreSQL scan it backwards for
+            # "-created" as well, and the implicit rowid/id tiebreaker stays in step.
+            models.Index(fields=['user', 'created'], name='meterdata_user_created_idx'),
+        ]
+
     def __str__(self):
         return f'User: {self.user.last_name}, Date: {self.created}'
 
@@ -30,3 +39,183 @@ class Profile(models.Model):
     def __str__(self):
         return f'{self.last_name} - apartment: {self.apartment}'
 
+
+
+class LatestReading(models.Model):
+    """The user's newest and second-newest reading, kept up to date on every save and delete."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='latest_reading')
+    record = models.ForeignKey(AddMeterData, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    previous = models.ForeignKey(AddMeterData, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Bumped by every submission; a submission that finds another version lost a race.
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'Latest reading of user {self.user_id}'
+
+
+
+class ConsumptionRollup(models.Model):
+    PERIOD_CHOICES = (
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='consumption_rollups')
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    bucket_start = models.DateField()
+    meter_1 = models.IntegerField(default=0)
+    meter_2 = models.IntegerField(default=0)
+    meter_3 = models.IntegerField(default=0)
+    meter_4 = models.IntegerField(default=0)
+    meter_5 = models.IntegerField(default=0)
+    readings = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period', 'bucket_start'], name='unique_rollup_bucket'),
+        ]
+
+    def __str__(self):
+        return f'{self.period} rollup {self.bucket_start} (user {self.user_id})'
+
+
+class Meter(models.Model):
+    KIND_CHOICES = (
+        ('electricity', 'Electricity'),
+        ('cold_water', 'Cold water'),
+        ('hot_water', 'Hot water'),
+        ('gas', 'Gas'),
+        ('heat', 'Heat'),
+        ('other', 'Other'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='meters')
+    # Positions 1-5 mirror AddMeterData.meter_1 ... meter_5; higher positions are extra meters.
+    position = models.PositiveSmallIntegerField()
+    label = models.CharField(max_length=50)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='other')
+    unit = models.CharField(max_length=10, blank=True)
+
+    class Meta:
+        ordering = ('user', 'position')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'position'], name='unique_meter_position'),
+        ]
+
+    def __str__(self):
+        return f'{self.label} (user {self.user_id})'
+
+
+class MeterReading(models.Model):
+    meter = models.ForeignKey(Meter, on_delete=models.CASCADE, related_name='readings')
+    created = models.DateTimeField(default=timezone.now)
+    value = models.IntegerField()
+    source = models.ForeignKey(
+        AddMeterData, on_delete=models.CASCADE, null=True, blank=True, related_name='meter_readings',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['meter', 'created'], name='meterreading_meter_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.meter.label}: {self.value} at {self.created}'
+
+
+class AnomalyState(models.Model):
+    NORMAL = 'normal'
+    HIGH = 'high'
+    LOW = 'low'
+    DECREASE = 'decrease'
+    LEAK = 'leak'
+    STATUS_CHOICES = (
+        (NORMAL, 'Normal'),
+        (HIGH, 'High spike'),
+        (LOW, 'Low usage'),
+        (DECREASE, 'Decrease'),
+        (LEAK, 'Possible leak'),
+    )
+
+    meter = models.OneToOneField(Meter, on_delete=models.CASCADE, related_name='anomaly_state')
+    readings = models.PositiveIntegerField(default=0)
+    last_created = models.DateTimeField(null=True, blank=True)
+    last_value = models.IntegerField(null=True, blank=True)
+    # Empty while every detector is still warming up.
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, blank=True)
+    score = models.FloatField(null=True, blank=True)
+    high_run = models.PositiveSmallIntegerField(default=0)
+    state = models.JSONField(default=dict)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.meter}: {self.status or "warming up"}'
+
+
+class GatewayToken(models.Model):
+    """API credential of a smart-meter gateway; only the SHA-256 of the key is stored."""
+
+    name = models.CharField(max_length=100)
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    # An empty scope field matches every profile; a building gateway sets all three.
+    city = models.CharField(max_length=20, blank=True)
+    street = models.CharField(max_length=50, blank=True)
+    building = models.CharField(max_length=10, blank=True)
+    is_active = models.BooleanField(default=True)
+    created = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField(null=True, blank=True, editable=False)
+
+    def __str__(self):
+        return self.name
+
+
+class Job(models.Model):
+    """A unit of background work (import, export, report) picked up by ``manage.py run_jobs``."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+    KIND_CHOICES = (
+        ('import', 'Reading import'),
+        ('export', 'Reading export'),
+        ('report', 'Consumption report'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(default=dict)
+    input_file = models.FileField(upload_to='jobs/input/', blank=True)
+    result_file = models.FileField(upload_to='jobs/output/', blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # Not picked up before this time; retries move it forward.
+    run_after = models.DateTimeField(default=timezone.now)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} #{self.pk} ({self.status})'
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
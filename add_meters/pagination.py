@@ -0,0 +1,56 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(record):
+    raw = f'{record.created.isoformat()}|{record.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_raw, pk_raw = raw.rsplit('|', 1)
+        created = parse_datetime(created_raw)
+        pk = int(pk_raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor('Malformed cursor.') from exc
+    if created is None:
+        raise InvalidCursor('Malformed cursor.')
+    return created, pk
+
+
+def _seek(queryset, cursor):
+    queryset = queryset.order_by('-created', '-pk')
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created__lt=created) | Q(created=created, pk__lt=pk))
+    return queryset
+
+
+def _split_page(records, page_size):
+    next_cursor = encode_cursor(records[page_size - 1]) if len(records) > page_size else None
+    return records[:page_size], next_cursor
+
+
+def keyset_page(queryset, cursor=None, page_size=50):
+    """Return ``(records, next_cursor)`` for the page of ``queryset`` after ``cursor``, newest first.
+
+    Seeks on ``(created, id)`` instead of using OFFSET, so every page costs the same
+    index range scan no matter how deep into the history it is.
+    """
+    records = list(_seek(queryset, cursor)[:page_size + 1])
+    return _split_page(records, page_size)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=50):
+    """Async version of ``keyset_page``."""
+    records = [item async for item in _seek(queryset, cursor)[:page_size + 1]]
+    return _split_page(records, page_size)
@@ -0,0 +1,58 @@
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import ConsumptionRollup
+from .rollups import get_bucket_start
+from .validation import METER_FIELDS
+
+
+REPORT_GROUPS = {
+    'city': ('user__profile__city',),
+    'street': ('user__profile__city', 'user__profile__street'),
+    'building': ('user__profile__city', 'user__profile__street', 'user__profile__building'),
+}
+REPORT_MONTHS = (3, 6, 12, 24)
+
+
+def _months_back(month_start, count):
+    """The first day of the month ``count`` calendar months before ``month_start``."""
+    index = month_start.year * 12 + month_start.month - 1 - count
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def build_consumption_report(group, months):
+    """Consumption of all users per ``group`` over the last ``months`` months, from the monthly rollups.
+
+    The result is JSON-serializable so it can be stored on a job.
+    """
+    group_fields = REPORT_GROUPS[group]
+    since = _months_back(get_bucket_start(timezone.now(), 'month'), months - 1)
+    rollups = ConsumptionRollup.objects.filter(period='month', bucket_start__gte=since)
+    sums = {key: Sum(key) for key in METER_FIELDS}
+
+    totals = (
+        rollups.values(*group_fields)
+        .annotate(apartments=Count('user', distinct=True), **sums)
+        .order_by(*group_fields)
+    )
+    monthly = (
+        rollups.values('bucket_start', *group_fields)
+        .annotate(**sums)
+        .order_by('bucket_start', *group_fields)
+    )
+
+    def group_label(row):
+        return ' / '.join(row[field] or '(no profile)' for field in group_fields)
+
+    return {
+        'group': group,
+        'months': months,
+        'totals': [
+            {'label': group_label(row), 'apartments': row['apartments'], 'values': [row[key] for key in METER_FIELDS]}
+            for row in totals
+        ],
+        'monthly': [
+            {'month': row['bucket_start'].isoformat(), 'label': group_label(row), 'values': [row[key] for key in METER_FIELDS]}
+            for row in monthly
+        ],
+    }
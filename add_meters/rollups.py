@@ -0,0 +1,80 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AddMeterData, ConsumptionRollup
+
+
+METER_KEYS = ('meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5')
+PERIODS = ('day', 'week', 'month')
+
+
+def get_bucket_start(value, period):
+    day = timezone.localtime(value).date() if isinstance(value, datetime) else value
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def refresh_rollups(user, since=None):
+    """Recompute the user's rollup buckets touched by readings created at or after ``since``.
+
+    ``user`` is a user or a user id. Without ``since`` every bucket of the user is rebuilt
+    from scratch.
+    """
+    user_id = getattr(user, 'pk', user)
+    readings = AddMeterData.objects.filter(user_id=user_id).order_by('created', 'id')
+    baseline = None
+    first_buckets = {}
+
+    if since is not None:
+        first_buckets = {period: get_bucket_start(since, period) for period in PERIODS}
+        window_start = _start_of_day(min(first_buckets.values()))
+        baseline = (
+            readings.filter(created__lt=window_start)
+            .order_by('-created', '-id')
+            .values_list('created', *METER_KEYS)
+            .first()
+        )
+        readings = readings.filter(created__gte=window_start)
+
+    buckets = {}
+    prev_row = baseline
+    tz = timezone.get_current_timezone()
+    for row in readings.values_list('created', *METER_KEYS).iterator():
+        if prev_row is not None:
+            day = row[0].astimezone(tz).date()
+            for period in PERIODS:
+                start = get_bucket_start(day, period)
+                if since is not None and start < first_buckets[period]:
+                    continue
+                bucket = buckets.get((period, start))
+                if bucket is None:
+                    bucket = buckets[(period, start)] = ConsumptionRollup(
+                        user_id=user_id, period=period, bucket_start=start,
+                    )
+                for index, key in enumerate(METER_KEYS, start=1):
+                    setattr(bucket, key, getattr(bucket, key) + row[index] - prev_row[index])
+                bucket.readings += 1
+        prev_row = row
+
+    with transaction.atomic():
+        stale = ConsumptionRollup.objects.filter(user_id=user_id)
+        if since is not None:
+            touched = Q()
+            for period in PERIODS:
+                touched |= Q(period=period, bucket_start__gte=first_buckets[period])
+            stale.filter(touched).delete()
+        else:
+            stale.delete()
+        ConsumptionRollup.objects.bulk_create(buckets.values())
+
+    return len(buckets)
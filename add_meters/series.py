@@ -0,0 +1,118 @@
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from operator import sub
+
+from django.db.models import FilteredRelation, Q
+
+from .analytics import ReadingColumns
+from .models import AnomalyState, Meter
+
+
+@dataclass
+class MeterSeries:
+    """Readings of one meter as parallel, chronologically ordered arrays."""
+
+    meter: Meter
+    timestamps: list = field(default_factory=list)
+    values: array = field(default_factory=lambda: array('q'))
+    # Only loaded with ``with_anomalies=True``, and only once a detector has a status.
+    anomaly: AnomalyState = None
+
+    @property
+    def key(self):
+        # Positions 1-5 share their key with the AddMeterData column they mirror.
+        return f'meter_{self.meter.position}'
+
+    def __len__(self):
+        return len(self.values)
+
+    def since(self, start):
+        """The part of the series from ``start`` on."""
+        index = bisect_left(self.timestamps, start)
+        return MeterSeries(self.meter, self.timestamps[index:], self.values[index:], self.anomaly)
+
+    def deltas(self):
+        return array('q', map(sub, self.values[1:], self.values[:-1]))
+
+    def last_delta(self):
+        return self.values[-1] - self.values[-2] if len(self.values) > 1 else 0
+
+    def total(self):
+        # Deltas telescope, so total consumption needs only the endpoints.
+        return self.values[-1] - self.values[0] if len(self.values) > 1 else 0
+
+    def bucket_sums(self, bucket_type):
+        """Return ``[(bucket_start, consumption)]`` ordered by bucket."""
+        columns = ReadingColumns(self.timestamps, {'value': self.values})
+        return [(start, values['value']) for start, values in columns.bucket_sums(bucket_type)]
+
+
+ANOMALY_COLUMNS = ('anomaly_state__status', 'anomaly_state__last_created')
+
+
+def _series_rows(user, since, min_position, with_anomalies):
+    condition = Q(position__gte=min_position)
+    if since is not None:
+        condition &= Q(readings__created__gte=since)
+    columns = ('pk', 'user_id', 'position', 'label', 'kind', 'unit', 'reading__created', 'reading__value')
+    return (
+        Meter.objects.filter(user=user)
+        .annotate(reading=FilteredRelation('readings', condition=condition))
+        .order_by('position', 'reading__created', 'reading__id')
+        .values_list(*columns, *(ANOMALY_COLUMNS if with_anomalies else ()))
+    )
+
+
+def _build_series(rows):
+    series = []
+    for pk, user_id, position, label, kind, unit, created, value, *anomaly in rows:
+        if not series or series[-1].meter.pk != pk:
+            meter = Meter(pk=pk, user_id=user_id, position=position, label=label, kind=kind, unit=unit)
+            series.append(MeterSeries(meter))
+            if anomaly and anomaly[0]:
+                status, last_created = anomaly
+                series[-1].anomaly = AnomalyState(meter=meter, status=status, last_created=last_created)
+        if created is not None:
+            series[-1].timestamps.append(created)
+            series[-1].values.append(value)
+    return series
+
+
+def load_user_series(user, since=None, min_position=1, with_anomalies=False):
+    """Return one MeterSeries per meter of ``user`` (any number of meters) from one query.
+
+    Meters below ``min_position`` are returned without readings. ``with_anomalies`` also
+    reads each meter's anomaly status in the same query.
+    """
+    return _build_series(_series_rows(user, since, min_position, with_anomalies).iterator())
+
+
+async def aload_user_series(user, since=None, min_position=1, with_anomalies=False):
+    return _build_series([row async for row in _series_rows(user, since, min_position, with_anomalies)])
+
+
+def range_days(series):
+    """Calendar days spanned by the readings of ``series``, like ``ReadingColumns.range_days``."""
+    timestamps = [value for item in series for value in item.timestamps[:1] + item.timestamps[-1:]]
+    if not timestamps:
+        return 0
+    return max(1, (max(timestamps).date() - min(timestamps).date()).days + 1)
+
+
+def format_bucket_label(bucket_start, bucket_type):
+    if bucket_type == 'day':
+        return bucket_start.strftime('%d.%m.%Y')
+    if bucket_type == 'week':
+        iso_year, iso_week, _ = bucket_start.isocalendar()
+        return f'W{iso_week:02d} {iso_year}'
+    return bucket_start.strftime('%m.%Y')
+
+
+def bucket_series(series, bucket_type):
+    """Merge per-meter bucket sums into ``[(bucket_start, {key: consumption})]``, keyed like the rollup columns."""
+    buckets = {}
+    for item in series:
+        for start, value in item.bucket_sums(bucket_type):
+            buckets.setdefault(start, dict.fromkeys((other.key for other in series), 0))[item.key] = value
+    return sorted(buckets.items())
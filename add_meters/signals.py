@@ -0,0 +1,87 @@
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .analytics_cache import bump_data_version
+from .anomalies import reset_anomaly_states
+from .auth import forget_cached_user
+from .latest import refresh_latest_reading
+from .meters import mirror_readings
+from .models import AddMeterData
+from .rollups import refresh_rollups
+
+
+# Readings removed by one ``QuerySet.delete()``: {queryset: {user_id: earliest created}}.
+_bulk_deletes = WeakKeyDictionary()
+
+
+def _deleted_with_user(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return hasattr(model, '_meta') and model._meta.label == settings.AUTH_USER_MODEL
+
+
+@receiver(post_save, sender=AddMeterData)
+def invalidate_user_analytics(sender, instance, **kwargs):
+    # Bump after commit so readers cannot cache pre-commit data under the new version.
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_data_version(user_id))
+
+
+@receiver(post_save, sender=AddMeterData)
+def mirror_meter_readings(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        mirror_readings([instance], created=created)
+
+
+@receiver(post_save, sender=AddMeterData)
+def track_latest_reading(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_latest_reading(instance.user_id)
+
+
+@receiver(post_save, sender=AddMeterData)
+def track_consumption_rollups(sender, instance, raw=False, **kwargs):
+    # ``created`` is not editable, so only buckets from the reading's own day onwards can change.
+    if not raw:
+        refresh_rollups(instance.user_id, since=instance.created)
+
+
+@receiver(pre_delete, sender=AddMeterData)
+def collect_bulk_reading_delete(sender, instance, origin=None, **kwargs):
+    # pre_delete runs for every collected row before the first one is deleted.
+    if isinstance(origin, QuerySet) and not _deleted_with_user(origin):
+        pending = _bulk_deletes.setdefault(origin, {})
+        pending[instance.user_id] = min(instance.created, pending.get(instance.user_id, instance.created))
+
+
+@receiver(post_delete, sender=AddMeterData)
+def refresh_after_reading_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with_user(origin):
+        # The user's rollups, meters and latest reading go with the same cascade.
+        return
+    since = instance.created
+    if isinstance(origin, QuerySet):
+        # All rows of a bulk delete are gone before post_delete runs, so refresh each user once.
+        pending = _bulk_deletes.get(origin, {})
+        if instance.user_id not in pending:
+            return
+        since = pending.pop(instance.user_id)
+    user_id = instance.user_id
+    reset_anomaly_states(user_id=user_id)
+    refresh_latest_reading(user_id)
+    refresh_rollups(user_id, since=since)
+    transaction.on_commit(lambda: bump_data_version(user_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers sync_user_identity_from_profile, password changes, deactivation and last_login updates.
+    # Dropped again after commit in case a concurrent request re-cached the old row meanwhile.
+    user_id = instance.pk
+    forget_cached_user(user_id)
+    transaction.on_commit(lambda: forget_cached_user(user_id))
@@ -0,0 +1,82 @@
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .importers import refresh_after_bulk_insert
+from .meters import mirror_readings
+from .models import AddMeterData, Profile
+from .validation import METER_FIELDS
+
+
+DEFAULT_BATCH_SIZE = 5000
+# Average daily consumption per meter (electricity, cold water, hot water, gas, heat).
+BASE_DAILY_USAGE = (9.0, 0.25, 0.12, 1.4, 0.6)
+# How strongly each meter follows the seasons; heating and gas peak in winter.
+SEASONAL_AMPLITUDE = (0.2, 0.05, 0.1, 0.6, 0.9)
+
+
+def iter_synthetic_readings(rng, start, end, interval):
+    """Yield ``(created, values)`` with monotonically increasing, seasonal meter values."""
+    totals = [rng.randint(0, 5000) for _ in METER_FIELDS]
+    scale = rng.uniform(0.6, 1.6)
+    interval_days = interval.total_seconds() / 86400
+    created = start
+    while created <= end:
+        season = math.cos(2 * math.pi * (created.timetuple().tm_yday - 15) / 365)
+        for index, (base, amplitude) in enumerate(zip(BASE_DAILY_USAGE, SEASONAL_AMPLITUDE)):
+            usage = base * scale * (1 + amplitude * season) * interval_days * rng.uniform(0.7, 1.3)
+            totals[index] += max(0, round(usage))
+        yield created, dict(zip(METER_FIELDS, totals))
+        created += interval
+
+
+def generate_meter_data(users, years, interval=timedelta(days=1), prefix='synthetic', password='synthetic-pass',
+                        seed=None, batch_size=DEFAULT_BATCH_SIZE, now=None, progress=None):
+    """Create ``users`` users with profiles and ``years`` of readings each; returns ``(users, readings)``.
+
+    Readings are written with ``bulk_create``; the derived data (per-meter rows, rollups,
+    latest reading, anomaly states) is built the same way the bulk importer does it.
+    """
+    rng = random.Random(seed)
+    end = now or timezone.now()
+    start = end - timedelta(days=round(365 * years))
+    User = get_user_model()
+    first_index = User.objects.filter(username__startswith=f'{prefix}-').count()
+    # Hashing is deliberately slow; every generated user shares one hash.
+    password_hash = make_password(password)
+
+    created_readings = 0
+    for index in range(first_index, first_index + users):
+        with transaction.atomic():
+            user = User.objects.create(username=f'{prefix}-{index}', password=password_hash)
+            Profile.objects.create(
+                user=user, first_name='Test', last_name=f'User {index}', email=f'{prefix}-{index}@example.com',
+                city='Sample City', street=f'Street {index // 100}', building=str(index // 20 % 5 + 1),
+                apartment=index % 20 + 1, phone_number='000',
+            )
+
+        batch = []
+        for created, values in iter_synthetic_readings(rng, start, end, interval):
+            batch.append(AddMeterData(user=user, created=created, **values))
+            if len(batch) >= batch_size:
+                created_readings += _write_batch(batch)
+        if batch:
+            created_readings += _write_batch(batch)
+        refresh_after_bulk_insert(user, since=start)
+        if progress:
+            progress(index - first_index + 1, created_readings)
+    return users, created_readings
+
+
+def _write_batch(batch):
+    with transaction.atomic():
+        AddMeterData.objects.bulk_create(batch)
+        mirror_readings(batch, created=True)
+    count = len(batch)
+    batch.clear()
+    return count
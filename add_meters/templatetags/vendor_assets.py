@@ -0,0 +1,28 @@
+from django import template
+from django.utils.html import format_html
+
+from add_meters.assets import VENDOR_ASSETS, asset_url
+
+
+register = template.Library()
+
+
+def _integrity(name, is_local):
+    # Only the CDN copy needs checking; collectstatic rewrites the source map
+    # reference in our own copy, which changes its hash.
+    integrity = VENDOR_ASSETS[name].integrity
+    if is_local or not integrity:
+        return ''
+    return format_html(' integrity="{}" crossorigin="anonymous"', integrity)
+
+
+@register.simple_tag
+def vendor_stylesheet(name):
+    url, is_local = asset_url(name)
+    return format_html('<link href="{}" rel="stylesheet"{}>', url, _integrity(name, is_local))
+
+
+@register.simple_tag
+def vendor_script(name):
+    url, is_local = asset_url(name)
+    return format_html('<script src="{}"{}></script>', url, _integrity(name, is_local))
@@ -0,0 +1,111 @@
+"""Query guards for the test suite: N+1 detection per request and row-count scaling checks.
+
+Add ``QueryGuardMixin`` to a TestCase to opt in; every request made through the test
+client is then checked for queries of the same shape repeated within that request.
+"""
+import re
+import time
+from collections import Counter
+
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+_STRING_LITERALS = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERALS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_VALUE_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+# Transaction bookkeeping repeats by design and says nothing about the data access.
+_IGNORED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT')
+
+
+def query_shape(sql):
+    """Reduce ``sql`` to its shape: literals and placeholder lists of any length become ``?``."""
+    shape = _STRING_LITERALS.sub('?', sql)
+    shape = _NUMBER_LITERALS.sub('?', shape)
+    shape = _VALUE_LISTS.sub('(?)', shape)
+    return ' '.join(shape.split())
+
+
+class QueryWatcher:
+    """Execute wrapper that groups the shapes of executed queries by test client request."""
+
+    def __init__(self, slow_threshold=None):
+        self.slow_threshold = slow_threshold
+        self.requests = []
+        self.slow = []
+        self._current = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if self._current is not None and not sql.lstrip().upper().startswith(_IGNORED):
+                self._current[1].append(query_shape(sql))
+            if self.slow_threshold is not None and elapsed > self.slow_threshold:
+                self.slow.append((elapsed, sql))
+
+    def start_request(self, environ=None, **kwargs):
+        self._current = ((environ or {}).get('PATH_INFO', '?'), [])
+
+    def finish_request(self, **kwargs):
+        if self._current is not None:
+            self.requests.append(self._current)
+            self._current = None
+
+    def repeated(self, threshold):
+        """Return ``[(path, shape, count)]`` for shapes run ``threshold`` or more times in one request."""
+        return [
+            (path, shape, count)
+            for path, shapes in self.requests
+            for shape, count in Counter(shapes).items()
+            if count >= threshold
+        ]
+
+
+class QueryGuardMixin:
+    """Fail a test when one request repeats a query shape (N+1) or runs a slow query.
+
+    ``assertQueryCountStable`` additionally checks that an action's query count does
+    not depend on how many rows exist.
+    """
+
+    query_repeat_threshold = 3
+    # Seconds; None disables the slow query check.
+    slow_query_threshold = None
+
+    def setUp(self):
+        super().setUp()
+        self.query_watcher = QueryWatcher(slow_threshold=self.slow_query_threshold)
+        wrapper = connection.execute_wrapper(self.query_watcher)
+        wrapper.__enter__()
+        self.addCleanup(wrapper.__exit__, None, None, None)
+        request_started.connect(self.query_watcher.start_request)
+        request_finished.connect(self.query_watcher.finish_request)
+        self.addCleanup(request_started.disconnect, self.query_watcher.start_request)
+        self.addCleanup(request_finished.disconnect, self.query_watcher.finish_request)
+
+    def tearDown(self):
+        try:
+            repeated = self.query_watcher.repeated(self.query_repeat_threshold)
+            if repeated:
+                details = '\n'.join(f'  {path}: {count}x {shape}' for path, shape, count in repeated)
+                self.fail(f'Repeated queries within one request (possible N+1):\n{details}')
+            if self.query_watcher.slow:
+                details = '\n'.join(f'  {elapsed * 1000:.0f} ms: {sql}' for elapsed, sql in self.query_watcher.slow)
+                self.fail(f'Queries slower than {self.slow_query_threshold}s:\n{details}')
+        finally:
+            super().tearDown()
+
+    def assertQueryCountStable(self, set_rows, action, sizes=(2, 20)):
+        """Call ``set_rows(size)`` and then ``action()`` for each size; the query counts must match."""
+        counts = []
+        for size in sizes:
+            set_rows(size)
+            with CaptureQueriesContext(connection) as queries:
+                action()
+            counts.append(len(queries))
+        if len(set(counts)) > 1:
+            self.fail(f'Query count grows with the number of rows: {dict(zip(sizes, counts))}')
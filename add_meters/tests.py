@@ -1,19 +1,70 @@
-from datetime import timedelta
+import asyncio
+import csv
+import importlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
 
-from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.contrib.staticfiles import finders
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
 from django.contrib.messages import get_messages
-from django.test import TestCase
-from django.urls import reverse
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.template import Context, Template, engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
 from django.utils import timezone
 
-from add_meters.models import AddMeterData, Profile
+from add_meters.analytics import HAS_NUMPY, ReadingColumns, downsample_indices, summarize_buckets
+from add_meters.analytics_cache import VERSION_KEY, bump_data_version, cached_analytics, get_data_version
+from add_meters.anomalies import AnomalyEngine, rebuild_anomaly_states
+from add_meters.assets import VENDOR_ASSETS, asset_url, subresource_integrity
+from add_meters.auth import CachedModelBackend
+from add_meters.gateway import issue_gateway_token, submit_readings
+from add_meters.importers import import_readings
+from add_meters.latest import get_latest_reading
+from add_meters.jobs import JobError, Worker, claim_next_job, enqueue_job, requeue_stale_jobs, run_job
+from add_meters.meters import mirror_readings
+from add_meters.models import (
+    AddMeterData, AnomalyState, ConsumptionRollup, Job, LatestReading, Meter, MeterReading, Profile,
+)
+from add_meters.pagination import encode_cursor
+from add_meters.reports import build_consumption_report
+from add_meters.rollups import get_bucket_start, refresh_rollups
+from add_meters.series import load_user_series
+from add_meters.synthetic import generate_meter_data
+from add_meters.testing import QueryGuardMixin, query_shape
+from add_meters.validation import METER_FIELDS, validate_meter_values
+from add_meters.views import AsyncMeterDetailView, AsyncMeterFormView, AsyncProfileListView, ProfileListView
+from meter.database import database_settings
+from meter.instrumentation import REGISTRY
 
 
 User = get_user_model()
 
 
-class MeterAppTests(TestCase):
+class MeterAppTests(QueryGuardMixin, TestCase):
     def setUp(self):
+        super().setUp()
+        cache.clear()
         self.password = 'test-pass-123'
         self.user = User.objects.create_user(username='tester', password=self.password)
 
@@ -22,9 +73,9 @@ class MeterAppTests(TestCase):
 
     @staticmethod
     def create_meter_record(user, meter_values, days_ago):
-        record = AddMeterData.objects.create(user=user, **meter_values)
         dt = timezone.now() - timedelta(days=days_ago)
-        AddMeterData.objects.filter(pk=record.pk).update(created=dt, updated=dt)
+        record = AddMeterData.objects.create(user=user, created=dt, **meter_values)
+        AddMeterData.objects.filter(pk=record.pk).update(updated=dt)
         return AddMeterData.objects.get(pk=record.pk)
 
     def test_add_view_requires_authentication(self):
@@ -242,3 +293,1581 @@ class MeterAppTests(TestCase):
             len(response.context['chart_labels']),
             len(response.context['chart_meter_1']),
         )
+
+
+    def test_page_query_counts_do_not_grow_with_readings(self):
+        self.login()
+        Profile.objects.create(
+            user=self.user, first_name='John', last_name='Doe', email='john@example.com',
+            city='A', street='B', building='1', apartment=1, phone_number='111',
+        )
+
+        def set_rows(size):
+            for day in range(AddMeterData.objects.filter(user=self.user).count(), size):
+                self.create_meter_record(self.user, {key: 100 + day * 3 for key in METER_FIELDS}, days_ago=60 - day)
+
+        pages = (
+            (reverse('meters:profile'), {}),
+            (reverse('meters:detail'), {'period': 'all'}),
+            (reverse('meters:readings'), {}),
+            (reverse('meters:chart_api'), {'period': 'all'}),
+            (reverse('meters:update'), {}),
+        )
+        for url, params in pages:
+            with self.subTest(url=url):
+                def action():
+                    cache.clear()
+                    self.assertEqual(self.client.get(url, params).status_code, 200)
+
+                self.assertQueryCountStable(set_rows, action, sizes=(3, 30))
+
+
+class ConsumptionRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.password = 'test-pass-123'
+        self.user = User.objects.create_user(username='roller', password=self.password)
+
+    def test_rollups_are_updated_when_readings_are_saved(self):
+        self.client.login(username=self.user.username, password=self.password)
+        for value in (100, 110, 125):
+            self.client.post(reverse('meters:create'), data={f'meter_{i}': value for i in range(1, 6)})
+
+        month = ConsumptionRollup.objects.get(user=self.user, period='month')
+        self.assertEqual(month.meter_1, 25)
+        self.assertEqual(month.readings, 2)
+
+        self.client.post(reverse('meters:update'), data={f'meter_{i}': 130 for i in range(1, 6)})
+        month = ConsumptionRollup.objects.get(user=self.user, period='month')
+        self.assertEqual(month.meter_1, 30)
+        self.assertEqual(ConsumptionRollup.objects.get(user=self.user, period='day').meter_1, 30)
+
+    def test_all_time_history_matches_raw_readings_after_backfill(self):
+        for index, day in enumerate((400, 200, 70, 35, 3)):
+            MeterAppTests.create_meter_record(
+                user=self.user,
+                meter_values={f'meter_{i}': 100 + index * 10 * i for i in range(1, 6)},
+                days_ago=day,
+            )
+        out = io.StringIO()
+        call_command('backfill_rollups', stdout=out)
+        buckets = ConsumptionRollup.objects.filter(user=self.user).count()
+        self.assertIn(f'Rebuilt {buckets} rollup buckets for 1 users.', out.getvalue())
+
+        self.client.login(username=self.user.username, password=self.password)
+        response = self.client.get(reverse('meters:detail'), data={'period': 'all'})
+        self.assertEqual(len(response.context['chart_labels']), 4)
+        self.assertEqual(sum(response.context['chart_meter_3']), 120)
+        self.assertEqual(response.context['meter_summaries'][4]['total'], 200)
+
+    def test_refresh_since_only_rebuilds_later_buckets(self):
+        first = MeterAppTests.create_meter_record(
+            user=self.user, meter_values={f'meter_{i}': 10 for i in range(1, 6)}, days_ago=100,
+        )
+        MeterAppTests.create_meter_record(
+            user=self.user, meter_values={f'meter_{i}': 20 for i in range(1, 6)}, days_ago=40,
+        )
+        refresh_rollups(self.user)
+        latest = MeterAppTests.create_meter_record(
+            user=self.user, meter_values={f'meter_{i}': 50 for i in range(1, 6)}, days_ago=0,
+        )
+        refresh_rollups(self.user, since=latest.created)
+
+        months = ConsumptionRollup.objects.filter(user=self.user, period='month').order_by('bucket_start')
+        self.assertEqual([item.meter_1 for item in months], [10, 30])
+        self.assertTrue(months[0].bucket_start > first.created.date())
+
+    def test_deleting_a_reading_refreshes_the_all_time_chart(self):
+        for value, day in ((100, 60), (150, 30), (200, 1)):
+            newest = MeterAppTests.create_meter_record(self.user, {key: value for key in METER_FIELDS}, days_ago=day)
+        self.client.login(username=self.user.username, password=self.password)
+        with self.captureOnCommitCallbacks(execute=True):
+            newest.delete()
+
+        response = self.client.get(reverse('meters:chart_api'), data={'period': 'all'})
+        self.assertEqual(response.json()['summaries'][0]['total'], 50)
+        self.assertEqual(
+            sum(ConsumptionRollup.objects.filter(user=self.user, period='month').values_list('meter_1', flat=True)), 50,
+        )
+
+    def test_bulk_delete_refreshes_each_user_once(self):
+        other = User.objects.create_user(username='bulk-deleted')
+        for user in (self.user, other):
+            for value, day in ((100, 60), (150, 30), (170, 10), (200, 1)):
+                MeterAppTests.create_meter_record(user, {key: value for key in METER_FIELDS}, days_ago=day)
+        with mock.patch('add_meters.signals.refresh_rollups', wraps=refresh_rollups) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                AddMeterData.objects.filter(created__gte=timezone.now() - timedelta(days=20)).delete()
+
+        self.assertEqual(refresh.call_count, 2)
+        for user in (self.user, other):
+            latest = get_latest_reading(user)
+            self.assertEqual((latest.record.meter_1, latest.previous.meter_1), (150, 100))
+            months = ConsumptionRollup.objects.filter(user=user, period='month')
+            self.assertEqual(sum(months.values_list('meter_1', flat=True)), 50)
+
+    def test_deleting_a_user_does_not_refresh_per_reading(self):
+        def delete_user_with(count):
+            user = User.objects.create_user(username=f'leaving-{count}')
+            for day in range(count, 0, -1):
+                MeterAppTests.create_meter_record(user, {key: 100 - day for key in METER_FIELDS}, days_ago=day)
+            with CaptureQueriesContext(connection) as queries:
+                user.delete()
+            return len(queries)
+
+        self.assertEqual(delete_user_with(2), delete_user_with(20))
+
+    def test_data_migration_builds_missing_rollups(self):
+        for index, day in enumerate((70, 35, 3)):
+            MeterAppTests.create_meter_record(self.user, {key: 10 + index * 5 for key in METER_FIELDS}, days_ago=day)
+        other = User.objects.create_user(username='rolled')
+        MeterAppTests.create_meter_record(other, {key: 1 for key in METER_FIELDS}, days_ago=2)
+        MeterAppTests.create_meter_record(other, {key: 4 for key in METER_FIELDS}, days_ago=1)
+        expected = set(ConsumptionRollup.objects.filter(user=self.user).values_list('period', 'bucket_start', 'meter_1'))
+        ConsumptionRollup.objects.filter(user=self.user).delete()
+        other_rollups = set(ConsumptionRollup.objects.filter(user=other).values_list('pk', flat=True))
+
+        migration = importlib.import_module('add_meters.migrations.0015_populate_consumption_rollups')
+        migration.populate_consumption_rollups(django_apps, None)
+
+        rebuilt = set(ConsumptionRollup.objects.filter(user=self.user).values_list('period', 'bucket_start', 'meter_1'))
+        self.assertEqual(rebuilt, expected)
+        self.assertEqual(set(ConsumptionRollup.objects.filter(user=other).values_list('pk', flat=True)), other_rollups)
+
+
+class QueryPlanTests(TestCase):
+    """Fail when a hot per-user query stops being served by the (user, created) index."""
+
+    table = AddMeterData._meta.db_table
+    reading_tables = r'"add_meters_(addmeterdata|meterreading|anomalystate|consumptionrollup|latestreading|meter)"'
+    bad_plan_patterns = (
+        # A table (or join alias) read without an index; a full pass in index order is fine (the all-users export).
+        r'\bSCAN (add_meters_\w+|auth_user|reading|[TU]\d+)\b(?! USING (COVERING )?INDEX)',
+        r'TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY',
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='planner', password='test-pass-123')
+        other = User.objects.create_user(username='other-planner', password='test-pass-123')
+        for day in range(40, 0, -1):
+            for user in (cls.user, other):
+                MeterAppTests.create_meter_record(
+                    user=user,
+                    meter_values={f'meter_{i}': 1000 - day for i in range(1, 6)},
+                    days_ago=day,
+                )
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertions are written against SQLite EXPLAIN QUERY PLAN output.')
+
+    def explain(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def capture_page_queries(self):
+        """Request every reading page (and run both exports); return ``[(page, sql)]`` of the reading queries."""
+        use_temporary_media(self)
+        self.client.login(username='planner', password='test-pass-123')
+        latest = AddMeterData.objects.filter(user=self.user).latest('created')
+        cursor = encode_cursor(latest)
+        pages = [
+            ('profile', lambda: self.client.get(reverse('meters:profile'))),
+            ('detail 30 days', lambda: self.client.get(reverse('meters:detail'), {'period': '30'})),
+            ('detail all time', lambda: self.client.get(reverse('meters:detail'), {'period': 'all'})),
+            ('readings page', lambda: self.client.get(reverse('meters:readings'), {'cursor': cursor})),
+            ('chart api', lambda: self.client.get(reverse('meters:chart_api'), {'period': '90'})),
+            ('create form', lambda: self.client.get(reverse('meters:create'))),
+            ('update form', lambda: self.client.get(reverse('meters:update'))),
+            ('rejected submission', lambda: self.client.post(reverse('meters:create'), {f'meter_{i}': 0 for i in range(1, 6)})),
+            ('submission', lambda: self.client.post(reverse('meters:create'), {f'meter_{i}': 2000 for i in range(1, 6)})),
+            ('export', lambda: enqueue_job('export', self.user, {'format': 'csv', 'scope': 'mine'}) and run_queued_jobs()),
+            ('export all', lambda: enqueue_job('export', self.user, {'format': 'csv', 'scope': 'all'}) and run_queued_jobs()),
+        ]
+        captured = []
+        for page, request in pages:
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                request()
+            captured.extend(
+                (page, query['sql']) for query in queries
+                if query['sql'].startswith('SELECT') and re.search(self.reading_tables, query['sql'])
+            )
+        return captured
+
+    def test_page_queries_use_indexes(self):
+        captured = self.capture_page_queries()
+        plans = []
+        for page, sql in captured:
+            with self.subTest(page=page, sql=sql[:120]):
+                plan = self.explain(sql)
+                plans.append(plan)
+                for pattern in self.bad_plan_patterns:
+                    self.assertIsNone(re.search(pattern, plan), f'Unexpected plan step {pattern!r} in:\n{plan}')
+
+        self.assertIn('meterdata_user_created_idx', '\n'.join(plans))
+        queries = '\n'.join(sql for _, sql in captured)
+        data = f'"{self.table}"'
+        for expected in (
+            # values() orders the export by column position: user_id, created, id.
+            f'INNER JOIN "auth_user" ON ({data}."user_id" = "auth_user"."id") ORDER BY 1 ASC, 3 ASC, {data}."id" ASC',
+            f'MIN({data}."created")',
+            'FROM "add_meters_meter" LEFT OUTER JOIN "add_meters_meterreading"',
+            'FROM "add_meters_anomalystate"',
+        ):
+            with self.subTest(expected=expected):
+                self.assertIn(expected, queries)
+
+
+class DashboardQueryBudgetTests(TestCase):
+    # Session, authenticated user, the latest readings with the profile, and every meter's series with its anomaly status.
+    query_budget = 4
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='budget', password='test-pass-123')
+        Profile.objects.create(
+            user=self.user, first_name='A', last_name='B', email='a@example.com',
+            city='C', street='D', building='1', apartment=1, phone_number='1',
+        )
+        self.client.login(username='budget', password='test-pass-123')
+
+    def add_history(self, days):
+        for day in range(days, -1, -1):
+            MeterAppTests.create_meter_record(
+                user=self.user,
+                meter_values={f'meter_{i}': 1000 - day * i for i in range(1, 6)},
+                days_ago=day,
+            )
+
+    def test_query_count_does_not_grow_with_history(self):
+        for days in (3, 120):
+            AddMeterData.objects.filter(user=self.user).delete()
+            cache.clear()
+            self.add_history(days)
+            with self.subTest(days=days), self.assertNumQueries(self.query_budget):
+                response = self.client.get(reverse('meters:profile'))
+            self.assertEqual(len(response.context['recent_records']), min(days + 1, 5))
+
+    def test_dashboard_values_match_per_query_computation(self):
+        self.add_history(45)
+        response = self.client.get(reverse('meters:profile'))
+
+        ordered = list(AddMeterData.objects.filter(user=self.user).order_by('-created'))
+        self.assertEqual(response.context['last_record'], ordered[0])
+        self.assertEqual(response.context['prev_record'], ordered[1])
+        self.assertEqual(list(response.context['recent_records']), ordered[:5])
+        window = [item for item in ordered if item.created >= timezone.now() - timedelta(days=30)]
+        expected_total = window[0].meter_2 - window[-1].meter_2
+        self.assertEqual(response.context['summary_30'][1]['total'], expected_total)
+
+
+class ReadingsPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='pager', password='test-pass-123')
+        self.client.login(username='pager', password='test-pass-123')
+        start = timezone.now() - timedelta(days=20)
+        # Pairs of readings share a timestamp so the id tiebreaker is exercised.
+        records = AddMeterData.objects.bulk_create([
+            AddMeterData(
+                user=self.user, created=start + timedelta(hours=i // 2),
+                meter_1=i, meter_2=i, meter_3=i, meter_4=i, meter_5=i,
+            )
+            for i in range(120)
+        ])
+        mirror_readings(records, created=True)
+
+    def test_detail_renders_first_page_only(self):
+        response = self.client.get(reverse('meters:detail'), data={'period': '30'})
+        self.assertEqual(len(response.context['meters']), 50)
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertContains(response, 'load-more-readings')
+        self.assertEqual(sum(response.context['chart_meter_1']), 119)
+
+    def test_cursor_walk_returns_every_reading_once_in_order(self):
+        response = self.client.get(reverse('meters:detail'), data={'period': '30'})
+        seen = [item.pk for item in response.context['meters']]
+        cursor = response.context['next_cursor']
+        while cursor:
+            payload = self.client.get(reverse('meters:readings'), data={'period': '30', 'cursor': cursor}).json()
+            seen.extend(item['id'] for item in payload['results'])
+            cursor = payload['next_cursor']
+
+        expected = list(AddMeterData.objects.order_by('-created', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(reverse('meters:readings'), data={'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AnalyticsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cached', password='test-pass-123')
+        self.client.login(username='cached', password='test-pass-123')
+        for day in (3, 2, 1):
+            MeterAppTests.create_meter_record(
+                user=self.user,
+                meter_values={f'meter_{i}': 100 - day * 10 for i in range(1, 6)},
+                days_ago=day,
+            )
+
+    def test_repeated_history_request_skips_aggregation_queries(self):
+        url = reverse('meters:detail')
+        self.client.get(url, data={'period': '30'})
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url, data={'period': '90'})
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(url, data={'period': '90'})
+        self.assertLess(len(warm), len(cold))
+        self.assertEqual(sum(response.context['chart_meter_1']), 20)
+
+    def test_saving_a_reading_invalidates_cached_summaries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse('meters:profile'))
+        self.assertEqual(response.context['summary_30'][0]['total'], 20)
+        version = get_data_version(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('meters:create'), data={f'meter_{i}': 130 for i in range(1, 6)})
+        self.assertEqual(get_data_version(self.user.pk), version + 1)
+
+        response = self.client.get(reverse('meters:profile'))
+        self.assertEqual(response.context['summary_30'][0]['total'], 60)
+        self.assertEqual(response.context['diff_rows'][0]['value'], 40)
+
+
+    def test_evicted_version_never_revives_older_entries(self):
+        for evict in (get_data_version, bump_data_version):
+            with self.subTest(after=evict.__name__):
+                cached_analytics(self.user.pk, 'probe', 'all', lambda: 'before')
+                bump_data_version(self.user.pk)
+                cached_analytics(self.user.pk, 'probe', 'all', lambda: 'stale')
+                cache.delete(VERSION_KEY.format(user_id=self.user.pk))
+
+                evict(self.user.pk)
+                self.assertEqual(cached_analytics(self.user.pk, 'probe', 'all', lambda: 'fresh'), 'fresh')
+
+class ChartApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='charter', password='test-pass-123')
+        self.client.login(username='charter', password='test-pass-123')
+        for day in (12, 6, 2):
+            MeterAppTests.create_meter_record(
+                user=self.user,
+                meter_values={f'meter_{i}': 100 - day for i in range(1, 6)},
+                days_ago=day,
+            )
+        self.url = reverse('meters:chart_api')
+
+    def test_returns_bucketed_series_with_validators(self):
+        response = self.client.get(self.url, data={'period': '30'})
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['bucket_type'], 'day')
+        self.assertEqual(len(payload['labels']), 2)
+        self.assertEqual([item['key'] for item in payload['series']], list(ProfileListView.meter_keys))
+        self.assertEqual(sum(payload['series'][0]['data']), 10)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_conditional_get_returns_304_until_data_changes(self):
+        etag = self.client.get(self.url, data={'period': '90'})['ETag']
+        response = self.client.get(self.url, data={'period': '90'}, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        other_period = self.client.get(self.url, data={'period': '7'}, headers={'if-none-match': etag})
+        self.assertEqual(other_period.status_code, 200)
+
+        AddMeterData.objects.filter(user=self.user).order_by('-created').first().delete()
+        response = self.client.get(self.url, data={'period': '90'}, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+def use_temporary_media(test):
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root)
+    override = override_settings(MEDIA_ROOT=media_root)
+    override.enable()
+    test.addCleanup(override.disable)
+
+
+def run_queued_jobs():
+    return Worker(processes=0).run(burst=True)
+
+
+class ReadingImportTests(TestCase):
+    csv_history = (
+        'created,meter_1,meter_2,meter_3,meter_4,meter_5\n'
+        '2024-01-01,10,10,10,10,10\n'
+        '2024-01-15T08:30:00,20,20,20,20,20\n'
+        '2024-01-20,15,25,25,25,25\n'
+        '2024-02-01,30,30,30,30,-1\n'
+        'not-a-date,40,40,40,40,40\n'
+        '2024-02-10,45,45,45,45,45\n'
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='importer', password='test-pass-123')
+
+    def test_import_validates_rows_in_memory_and_batches_inserts(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = import_readings(self.user, io.StringIO(self.csv_history), batch_size=2)
+        reading_queries = [
+            query['sql'].split()[0] for query in queries
+            if f'"{AddMeterData._meta.db_table}"' in query['sql']
+        ]
+        # One previous-reading lookup, then per batch one insert and the derived-data refresh.
+        self.assertEqual(reading_queries[:2], ['SELECT', 'INSERT'])
+        self.assertEqual(reading_queries.count('INSERT'), 2)
+        self.assertEqual(result.created, 3)
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6])
+        self.assertIn('Meter 1 must be greater than or equal to 20.', result.errors[0][1])
+        self.assertIn('Meter 5 must be greater than or equal to 20.', result.errors[1][1])
+
+    def test_import_keeps_timestamps_and_builds_rollups(self):
+        rows = [
+            {'created': '2024-03-01T00:00:00+00:00', **{f'meter_{i}': 5 for i in range(1, 6)}},
+            {'created': '2024-04-01T00:00:00+00:00', **{f'meter_{i}': 9 for i in range(1, 6)}},
+        ]
+        lines = io.StringIO('\n'.join(json.dumps(row) for row in rows) + '\n{"broken"\n')
+        result = import_readings(self.user, lines, fmt='jsonl')
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, [(3, 'Invalid JSON.')])
+        first = AddMeterData.objects.filter(user=self.user).earliest('created')
+        self.assertEqual(first.created.isoformat(), '2024-03-01T00:00:00+00:00')
+        april = ConsumptionRollup.objects.get(user=self.user, period='month')
+        self.assertEqual((april.bucket_start.month, april.meter_5), (4, 4))
+
+    def test_import_rejects_rows_older_than_existing_readings(self):
+        MeterAppTests.create_meter_record(self.user, {f'meter_{i}': 1 for i in range(1, 6)}, days_ago=1)
+        result = import_readings(self.user, io.StringIO(self.csv_history))
+        self.assertEqual(result.created, 0)
+        self.assertTrue(all('newer than the previous' in message for _, message in result.errors[:3]))
+
+    def test_impossible_and_future_dates_are_reported_per_row(self):
+        future = (timezone.now() + timedelta(days=1)).date().isoformat()
+        lines = io.StringIO(
+            'created,meter_1,meter_2,meter_3,meter_4,meter_5\n'
+            '2024-01-01,10,10,10,10,10\n'
+            '2024-02-30,20,20,20,20,20\n'
+            f'{future},30,30,30,30,30\n'
+            '2024-03-01,40,40,40,40,40\n'
+        )
+        result = import_readings(self.user, lines, batch_size=1)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, [
+            (3, '"created" must be an ISO date or datetime.'),
+            (4, '"created" must not be in the future.'),
+        ])
+        self.assertEqual(get_latest_reading(self.user).record.meter_1, 40)
+
+    def test_interrupted_import_leaves_committed_batches_consistent(self):
+        def stop(result):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            import_readings(self.user, io.StringIO(self.csv_history), batch_size=2, progress=stop)
+
+        records = list(AddMeterData.objects.filter(user=self.user).order_by('-created'))
+        self.assertEqual(len(records), 2)
+        latest = get_latest_reading(self.user)
+        self.assertEqual((latest.record, latest.previous), (records[0], records[1]))
+        rollup = ConsumptionRollup.objects.get(user=self.user, period='month')
+        self.assertEqual(rollup.meter_1, records[0].meter_1 - records[1].meter_1)
+
+    def test_import_stops_when_another_reading_is_saved_between_batches(self):
+        def save_concurrently(result):
+            if result.created == 2:
+                AddMeterData.objects.create(user=self.user, **{f'meter_{i}': 100 for i in range(1, 6)})
+
+        result = import_readings(self.user, io.StringIO(self.csv_history), batch_size=1, progress=save_concurrently)
+        self.assertEqual(result.created, 2)
+        self.assertIn('Another reading was saved during the import', result.errors[-1][1])
+        self.assertEqual(AddMeterData.objects.filter(user=self.user).count(), 3)
+
+    def test_upload_view_queues_import_job(self):
+        use_temporary_media(self)
+        self.client.login(username='importer', password='test-pass-123')
+        upload = SimpleUploadedFile('history.csv', self.csv_history.encode())
+        response = self.client.post(reverse('meters:import'), data={'file': upload})
+        job = Job.objects.get(user=self.user)
+        self.assertRedirects(response, reverse('meters:job', args=[job.pk]))
+        self.assertEqual((job.kind, job.status, job.max_attempts), ('import', Job.QUEUED, 1))
+        self.assertFalse(AddMeterData.objects.filter(user=self.user).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(run_queued_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.input_file.name), (Job.DONE, 100, ''))
+        self.assertEqual(AddMeterData.objects.filter(user=self.user).count(), 3)
+        response = self.client.get(reverse('meters:job', args=[job.pk]))
+        self.assertContains(response, 'Imported 3 readings.')
+        self.assertContains(response, 'Skipped 3 rows.')
+
+    def test_import_job_reports_badly_encoded_files_without_retrying(self):
+        use_temporary_media(self)
+        upload = SimpleUploadedFile('history.csv', 'created,meter_1\n2024-01-01,\u00e9'.encode('latin-1'))
+        job = enqueue_job('import', self.user, {'format': 'csv'}, input_file=upload)
+        run_queued_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertEqual(job.message, 'The file must be UTF-8 encoded text.')
+
+
+class ReadingExportTests(TestCase):
+    def setUp(self):
+        use_temporary_media(self)
+        self.user = User.objects.create_user(username='exporter', password='test-pass-123')
+        self.other = User.objects.create_user(username='another', password='test-pass-123')
+        for user, base in ((self.user, 100), (self.other, 500)):
+            for day, step in ((3, 0), (2, 4), (1, 10)):
+                MeterAppTests.create_meter_record(
+                    user=user,
+                    meter_values={f'meter_{i}': base + step * i for i in range(1, 6)},
+                    days_ago=day,
+                )
+        self.client.login(username='exporter', password='test-pass-123')
+
+    def export(self, **data):
+        response = self.client.post(reverse('meters:export'), data=data)
+        job = Job.objects.get(user=self.user)
+        self.assertRedirects(response, reverse('meters:job', args=[job.pk]))
+        run_queued_jobs()
+        return self.client.get(reverse('meters:job_download', args=[job.pk]))
+
+    def test_csv_export_job_writes_own_readings_with_deltas(self):
+        response = self.export(format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="meter-readings-mine-', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['username', 'created', 'meter_1'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][-5:], ['', '', '', '', ''])
+        self.assertEqual(rows[3][-5:], ['6', '12', '18', '24', '30'])
+
+    def test_all_users_export_is_staff_only_and_resets_deltas_per_user(self):
+        response = self.client.post(reverse('meters:export'), data={'format': 'jsonl', 'scope': 'all'})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.export(format='jsonl', scope='all')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual([row['username'] for row in rows], ['exporter'] * 3 + ['another'] * 3)
+        self.assertIsNone(rows[3]['delta_meter_1'])
+        self.assertEqual(rows[5]['delta_meter_2'], 12)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.post(reverse('meters:export'), data={'format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('meters:export')).status_code, 405)
+
+
+class AdminReportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='staff', password='test-pass-123')
+        self.client.login(username='staff', password='test-pass-123')
+        for index, (street, building) in enumerate((('Main', '1'), ('Main', '1'), ('Main', '2'), ('Side', '7'))):
+            user = User.objects.create_user(username=f'tenant-{index}', last_name=f'Tenant {index}')
+            Profile.objects.create(
+                user=user, first_name='T', last_name=f'Tenant {index}', email='t@example.com',
+                city='Delft', street=street, building=building, apartment=index, phone_number='1',
+            )
+            for day, value in ((20, 0), (10, 10), (1, 30)):
+                MeterAppTests.create_meter_record(user, {f'meter_{i}': value * i for i in range(1, 6)}, days_ago=day)
+            refresh_rollups(user)
+
+    def test_changelist_query_count_does_not_depend_on_rows(self):
+        url = reverse('admin:add_meters_addmeterdata_changelist')
+        # Warm the session and user caches so both measurements are warm requests.
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        for day in range(40, 60):
+            MeterAppTests.create_meter_record(self.admin, {f'meter_{i}': 0 for i in range(1, 6)}, days_ago=day)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(few), len(many))
+
+    def test_report_window_covers_exactly_the_requested_months(self):
+        ConsumptionRollup.objects.all().delete()
+        user = User.objects.get(username='tenant-0')
+        for year, month in ((2025, 3), (2025, 4), (2026, 1), (2026, 3)):
+            ConsumptionRollup.objects.create(user=user, period='month', bucket_start=date(year, month, 1), meter_1=1)
+
+        first_of_march = timezone.make_aware(datetime(2026, 3, 1, 12))
+        for months, first in ((12, '2025-04-01'), (3, '2026-01-01'), (1, '2026-03-01')):
+            with self.subTest(months=months), mock.patch('django.utils.timezone.now', return_value=first_of_march):
+                report = build_consumption_report('city', months)
+            self.assertEqual(report['monthly'][0]['month'], first)
+
+    def test_reports_aggregate_consumption_per_building(self):
+        url = reverse('admin:add_meters_addmeterdata_reports')
+        response = self.client.post(url, data={'group': 'building', 'months': 3})
+        job = Job.objects.get(kind='report')
+        self.assertRedirects(response, f'{url}?job={job.pk}')
+        response = self.client.get(url, data={'job': job.pk})
+        self.assertContains(response, 'Building the report')
+        self.assertNotIn('totals', response.context)
+
+        run_queued_jobs()
+        response = self.client.get(url, data={'job': job.pk})
+        self.assertEqual(response.status_code, 200)
+        totals = {row['label']: row for row in response.context['totals']}
+        self.assertEqual(totals['Delft / Main / 1']['apartments'], 2)
+        self.assertEqual(totals['Delft / Main / 1']['values'][0], 60)
+        self.assertEqual(totals['Delft / Side / 7']['values'][4], 150)
+        self.assertEqual(
+            sum(row['values'][0] for row in response.context['monthly']),
+            sum(row['values'][0] for row in response.context['totals']),
+        )
+
+
+class NormalizedMeterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='metered', password='test-pass-123')
+
+    def test_saved_readings_are_mirrored_per_meter(self):
+        record = MeterAppTests.create_meter_record(self.user, {f'meter_{i}': i * 10 for i in range(1, 6)}, days_ago=2)
+        self.assertEqual(Meter.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(
+            list(MeterReading.objects.filter(source=record).order_by('meter__position').values_list('value', flat=True)),
+            [10, 20, 30, 40, 50],
+        )
+
+        record.meter_3 = 35
+        record.save()
+        self.assertEqual(MeterReading.objects.get(source=record, meter__position=3).value, 35)
+        record.delete()
+        self.assertFalse(MeterReading.objects.exists())
+
+    def test_series_cover_extra_meters_in_one_query(self):
+        for day, value in ((30, 100), (20, 130), (10, 170)):
+            MeterAppTests.create_meter_record(self.user, {f'meter_{i}': value * i for i in range(1, 6)}, days_ago=day)
+        extra = Meter.objects.create(user=self.user, position=6, label='Garage', kind='electricity', unit='kWh')
+        MeterReading.objects.bulk_create([
+            MeterReading(meter=extra, value=value, created=timezone.now() - timedelta(days=day))
+            for day, value in ((25, 7), (5, 19))
+        ])
+
+        with self.assertNumQueries(1):
+            series = load_user_series(self.user)
+        self.assertEqual([item.meter.position for item in series], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(list(series[1].deltas()), [60, 80])
+        self.assertEqual(series[1].total(), 140)
+        self.assertEqual(series[5].total(), 12)
+
+    def test_extra_meters_are_submitted_and_shown_in_the_analytics(self):
+        cache.clear()
+        self.client.login(username='metered', password='test-pass-123')
+        garage = Meter.objects.create(user=self.user, position=6, label='Garage', kind='electricity', unit='kWh')
+        base = {f'meter_{i}': 100 for i in range(1, 6)}
+        for day, value in ((3, 10), (1, 25)):
+            MeterAppTests.create_meter_record(self.user, base, days_ago=day)
+            MeterReading.objects.create(meter=garage, value=value, created=timezone.now() - timedelta(days=day))
+
+        response = self.client.get(reverse('meters:create'))
+        self.assertContains(response, 'Garage')
+        response = self.client.post(reverse('meters:create'), {**base, 'meter_6': 20})
+        self.assertIn('Garage must be greater than or equal to 25.', response.context['form'].errors['meter_6'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('meters:create'), {**base, 'meter_6': 40})
+        record = AddMeterData.objects.filter(user=self.user).latest('created')
+        self.assertEqual(MeterReading.objects.get(meter=garage, source=record).value, 40)
+
+        response = self.client.get(reverse('meters:profile'))
+        self.assertEqual(response.context['summary_30'][5], {'label': 'Garage', 'total': 30, 'avg_per_day': 7.5})
+        self.assertEqual(response.context['diff_rows'][5]['value'], 15)
+        response = self.client.get(reverse('meters:detail'), {'period': '30'})
+        self.assertEqual(sum(response.context['chart_meter_6']), 30)
+        response = self.client.get(reverse('meters:detail'), {'period': 'all'})
+        self.assertEqual(sum(response.context['chart_meter_6']), 30)
+        self.assertEqual(response.context['meter_summaries'][5]['label'], 'Garage')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('meters:update'), {**base, 'meter_6': 45})
+        self.assertEqual(MeterReading.objects.get(meter=garage, source=record).value, 45)
+
+    def test_data_migration_populates_existing_readings(self):
+        for day in (3, 2, 1):
+            MeterAppTests.create_meter_record(self.user, {f'meter_{i}': 10 - day for i in range(1, 6)}, days_ago=day)
+        Meter.objects.all().delete()
+
+        migration = importlib.import_module('add_meters.migrations.0009_populate_meter_readings')
+        migration.populate_meter_readings(django_apps, None)
+
+        self.assertEqual(Meter.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(MeterReading.objects.filter(meter__user=self.user).count(), 15)
+        self.assertEqual(load_user_series(self.user)[0].total(), 2)
+
+
+class ReadingColumnsTests(TestCase):
+    def make_columns(self, vectorized):
+        rng = random.Random(7)
+        start = timezone.now() - timedelta(days=400)
+        created, partition = [], []
+        values = {key: [] for key in ProfileListView.meter_keys}
+        for user_id in (1, 2):
+            running = dict.fromkeys(values, 0)
+            for step in range(300):
+                created.append(start + timedelta(hours=step * 31 + user_id))
+                partition.append(user_id)
+                for key in values:
+                    running[key] += rng.randint(0, 40)
+                    values[key].append(running[key])
+        return ReadingColumns(created, values, partition=partition, vectorized=vectorized)
+
+    def test_python_path_matches_naive_loop(self):
+        columns = self.make_columns(vectorized=False)
+        expected = {}
+        for index in range(1, len(columns)):
+            if columns.partition[index] != columns.partition[index - 1]:
+                continue
+            start = get_bucket_start(columns.created[index], 'week')
+            bucket = expected.setdefault(start, dict.fromkeys(columns.values, 0))
+            for key, column in columns.values.items():
+                bucket[key] += column[index] - column[index - 1]
+        self.assertEqual(columns.bucket_sums('week'), sorted(expected.items()))
+        self.assertEqual(columns.totals()['meter_1'], sum(values['meter_1'] for values in expected.values()))
+
+    @skipUnless(HAS_NUMPY, 'NumPy is not installed.')
+    def test_vectorized_path_matches_python_path(self):
+        python, vectorized = self.make_columns(vectorized=False), self.make_columns(vectorized=True)
+        self.assertFalse(python.vectorized)
+        self.assertTrue(vectorized.vectorized)
+        self.assertEqual(vectorized.totals(), python.totals())
+        self.assertEqual(
+            {key: list(column) for key, column in vectorized.deltas().items()},
+            {key: list(column) for key, column in python.deltas().items()},
+        )
+        for bucket_type in ('day', 'week', 'month'):
+            with self.subTest(bucket_type=bucket_type):
+                self.assertEqual(vectorized.bucket_sums(bucket_type), python.bucket_sums(bucket_type))
+
+    def test_summaries_report_total_trend_and_average(self):
+        summaries = summarize_buckets([{'meter_1': 4}, {'meter_1': 10}, {'meter_1': 7}], 7, ['meter_1'])
+        self.assertEqual(summaries['meter_1'], {'total': 21, 'trend': -3, 'avg_per_day': 3.0})
+
+
+class AnomalyDetectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='anomalous', password='test-pass-123')
+
+    def add_history(self, daily_usage):
+        value = 0
+        for days_ago, usage in zip(range(len(daily_usage) - 1, -1, -1), daily_usage):
+            value += usage
+            MeterAppTests.create_meter_record(
+                self.user, {f'meter_{i}': value * i for i in range(1, 6)}, days_ago=days_ago,
+            )
+
+    def test_engine_warms_up_then_flags_spikes_and_leaks(self):
+        engine = AnomalyEngine()
+        state = AnomalyState(state={})
+        start = timezone.now() - timedelta(days=30)
+        value = 0
+        statuses = []
+        for day, usage in enumerate([10, 11, 9, 10, 12, 10, 9, 11, 10, 10, 60, 10, 55, 58, 61]):
+            value += usage
+            statuses.append(engine.observe(state, start + timedelta(days=day), value).status)
+
+        self.assertEqual(statuses[:9], [''] * 9)
+        self.assertEqual(statuses[9], AnomalyState.NORMAL)
+        self.assertEqual(statuses[10], AnomalyState.HIGH)
+        self.assertEqual(statuses[11], AnomalyState.NORMAL)
+        self.assertEqual(statuses[-1], AnomalyState.LEAK)
+        engine.observe(state, start + timedelta(days=16), value - 1)
+        self.assertEqual(state.status, AnomalyState.DECREASE)
+
+    def test_incremental_state_matches_full_replay(self):
+        self.add_history([10, 12, 9, 11, 10, 10, 13, 9, 10, 11, 10, 40])
+        incremental = {item.meter_id: item for item in AnomalyState.objects.filter(meter__user=self.user)}
+        self.assertEqual(len(incremental), 5)
+        self.assertEqual({item.status for item in incremental.values()}, {AnomalyState.HIGH})
+
+        rebuilt = rebuild_anomaly_states(incremental)
+        for meter_id, item in incremental.items():
+            self.assertEqual(item.readings, rebuilt[meter_id].readings)
+            self.assertEqual(item.status, rebuilt[meter_id].status)
+            self.assertAlmostEqual(item.state['detectors']['ewma']['mean'], rebuilt[meter_id].state['detectors']['ewma']['mean'])
+
+        record = AddMeterData.objects.filter(user=self.user).latest('created')
+        record.delete()
+        self.assertFalse(AnomalyState.objects.filter(meter__user=self.user).exists())
+
+    def test_profile_uses_anomaly_status_and_falls_back_during_warm_up(self):
+        self.client.login(username='anomalous', password='test-pass-123')
+        self.add_history([10, 10, 30])
+        response = self.client.get(reverse('meters:profile'))
+        self.assertEqual(response.context['diff_rows'][0]['status_label'], 'High spike')
+
+        AddMeterData.objects.filter(user=self.user).delete()
+        cache.clear()
+        self.add_history([10, 12, 9, 11, 10, 10, 13, 9, 10, 11, 10, 11, 10])
+        with mock.patch.object(ProfileListView, 'STATUS_LABELS', {**ProfileListView.STATUS_LABELS, 'normal': 'Engine normal'}):
+            response = self.client.get(reverse('meters:profile'))
+        self.assertEqual(response.context['diff_rows'][0]['status_label'], 'Engine normal')
+
+    def test_report_command_lists_flagged_meters(self):
+        self.add_history([10, 12, 9, 11, 10, 10, 13, 9, 10, 11, 10, 40])
+        AnomalyState.objects.all().delete()
+        out = io.StringIO()
+        call_command('anomaly_report', stdout=out)
+        output = out.getvalue()
+        self.assertIn('Rebuilt anomaly state for 5 meters.', output)
+        self.assertIn('anomalous\tMeter 1\tHigh spike', output)
+        self.assertIn('5 meters flagged.', output)
+
+
+class LatestReadingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='latest', password='test-pass-123')
+        self.client.login(username='latest', password='test-pass-123')
+        self.values = {f'meter_{i}': 10 * i for i in range(1, 6)}
+
+    def test_latest_reading_follows_saves_edits_and_deletes(self):
+        first = MeterAppTests.create_meter_record(self.user, self.values, days_ago=2)
+        second = MeterAppTests.create_meter_record(self.user, self.values, days_ago=1)
+        latest = LatestReading.objects.get(user=self.user)
+        self.assertEqual((latest.record, latest.previous), (second, first))
+
+        self.client.post(reverse('meters:update'), {key: value + 5 for key, value in self.values.items()})
+        self.assertEqual(LatestReading.objects.get(user=self.user).record.meter_1, 15)
+
+        second.delete()
+        latest = LatestReading.objects.get(user=self.user)
+        self.assertEqual((latest.record, latest.previous), (first, None))
+        first.delete()
+        self.assertFalse(LatestReading.objects.filter(user=self.user).exists())
+
+    def test_rejected_submission_reads_previous_values_once(self):
+        MeterAppTests.create_meter_record(self.user, self.values, days_ago=1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('meters:create'), {**self.values, 'meter_1': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Meter 1 must be greater than or equal to 10.', response.context['form'].errors['meter_1'])
+        self.assertEqual(response.context['last_record'].meter_1, 10)
+        reading_queries = [query['sql'] for query in queries if 'add_meters_' in query['sql']]
+        self.assertEqual(len(reading_queries), 1)
+        self.assertIn('add_meters_latestreading', reading_queries[0])
+
+    def test_concurrent_submission_loses_the_race(self):
+        MeterAppTests.create_meter_record(self.user, self.values, days_ago=1)
+        stale = get_latest_reading(self.user)
+        # Another request saves a higher reading after this one was validated.
+        AddMeterData.objects.create(user=self.user, **{key: value + 50 for key, value in self.values.items()})
+
+        with mock.patch('add_meters.views.get_latest_reading', side_effect=[stale, get_latest_reading(self.user)]):
+            response = self.client.post(reverse('meters:create'), {key: value + 1 for key, value in self.values.items()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Another reading was saved in the meantime', str(response.context['form'].non_field_errors()))
+        self.assertIn('Meter 1 must be greater than or equal to 60.', response.context['form'].errors['meter_1'])
+        self.assertEqual(AddMeterData.objects.filter(user=self.user).count(), 2)
+
+
+class GatewayApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = []
+        for apartment, building in ((1, '7'), (2, '7'), (3, '9')):
+            user = User.objects.create_user(username=f'flat{apartment}', password='test-pass-123')
+            Profile.objects.create(
+                user=user, first_name='A', last_name='B', email='a@example.com',
+                city='Town', street='Main', building=building, apartment=apartment, phone_number='1',
+            )
+            self.users.append(user)
+        MeterAppTests.create_meter_record(self.users[0], {f'meter_{i}': 100 for i in range(1, 6)}, days_ago=3)
+        self.token, self.key = issue_gateway_token('Main 7', city='Town', street='Main', building='7')
+        self.url = reverse('meters:readings_api')
+
+    def post(self, readings, key=None):
+        return self.client.post(
+            self.url, json.dumps({'readings': readings}), content_type='application/json',
+            headers={'Authorization': f'Bearer {key or self.key}'},
+        )
+
+    def reading(self, days_ago, value, **target):
+        created = (timezone.now() - timedelta(days=days_ago)).isoformat()
+        return {**target, 'created': created, **{f'meter_{i}': value for i in range(1, 6)}}
+
+    def test_requires_a_valid_active_token(self):
+        self.assertEqual(self.client.post(self.url, '{}', content_type='application/json').status_code, 401)
+        self.assertEqual(self.post([self.reading(1, 200, username='flat1')], key='wrong').status_code, 401)
+        self.token.is_active = False
+        self.token.save()
+        response = self.post([self.reading(1, 200, username='flat1')])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+
+    def test_batch_is_validated_per_user_and_reports_each_item(self):
+        apartment_2 = {'city': 'Town', 'street': 'Main', 'building': '7', 'apartment': 2}
+        response = self.post([
+            self.reading(1, 150, username='flat1'),
+            self.reading(2, 120, username='flat1'),
+            self.reading(1, 90, apartment=apartment_2),
+            self.reading(0, 80, apartment=apartment_2),
+            self.reading(1, 500, username='flat3'),
+            {'username': 'flat1', 'meter_1': 'x'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['created'], body['rejected']), (3, 3))
+        statuses = [item['status'] for item in body['results']]
+        self.assertEqual(statuses, ['created', 'created', 'created', 'rejected', 'rejected', 'rejected'])
+        self.assertEqual(body['results'][3]['error'], ' '.join(
+            f'Meter {i} must be greater than or equal to 90.' for i in range(1, 6)
+        ))
+        self.assertEqual(body['results'][4]['error'], 'Unknown user or apartment.')
+        self.assertEqual(body['results'][5]['error'], 'Meter 1 must be an integer.')
+
+        latest = LatestReading.objects.select_related('record').get(user=self.users[0])
+        self.assertEqual(latest.record.pk, body['results'][0]['id'])
+        self.assertEqual(MeterReading.objects.filter(meter__user=self.users[1]).count(), 5)
+        self.assertTrue(ConsumptionRollup.objects.filter(user=self.users[0], period='day').exists())
+
+    def test_latest_reading_is_committed_with_the_batch(self):
+        # The claim, the records and the refresh share one transaction: a failing refresh undoes all of them.
+        old = LatestReading.objects.get(user=self.users[0])
+        with mock.patch('add_meters.importers.refresh_rollups', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            submit_readings(self.token, [self.reading(1, 150, username='flat1')])
+
+        self.assertEqual(AddMeterData.objects.filter(user=self.users[0]).count(), 1)
+        latest = LatestReading.objects.get(user=self.users[0])
+        self.assertEqual((latest.record_id, latest.version), (old.record_id, old.version))
+
+    def test_invalid_calendar_dates_reject_only_their_item(self):
+        response = self.post([
+            {**self.reading(1, 150, username='flat1'), 'created': '2026-02-30'},
+            {**self.reading(1, 150, username='flat1'), 'created': '2026-13-01T08:00:00'},
+            self.reading(1, 150, username='flat1'),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([item['status'] for item in results], ['rejected', 'rejected', 'created'])
+        self.assertEqual(results[0]['error'], '"created" must be an ISO date or datetime.')
+
+    def test_readings_from_the_future_are_rejected(self):
+        skewed = {**self.reading(0, 150, username='flat1'), 'created': (timezone.now() + timedelta(minutes=1)).isoformat()}
+        response = self.post([self.reading(-1, 200, username='flat1'), skewed])
+
+        body = response.json()
+        self.assertEqual([item['status'] for item in body['results']], ['rejected', 'created'])
+        self.assertEqual(body['results'][0]['error'], '"created" must not be in the future.')
+        latest = LatestReading.objects.select_related('record').get(user=self.users[0])
+        self.assertEqual(latest.record.pk, body['results'][1]['id'])
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        counts = []
+        # The first batch also creates flat2's meters and state rows.
+        for start, size in ((0, 1), (10, 3), (20, 12)):
+            readings = [
+                self.reading(2 - (start + step) / 100, 1000 + start + step, username=username)
+                for step in range(size) for username in ('flat1', 'flat2')
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(readings)
+            self.assertEqual(response.json()['created'], size * 2)
+            counts.append(len(queries))
+        self.assertEqual(counts[1], counts[2])
+
+
+def async_meter_patterns():
+    from add_meters import urls
+
+    swapped = {'profile': AsyncProfileListView, 'create': AsyncMeterFormView, 'detail': AsyncMeterDetailView}
+    return [
+        path(str(pattern.pattern), swapped[pattern.name].as_view(), name=pattern.name)
+        if pattern.name in swapped else pattern
+        for pattern in urls.urlpatterns
+    ]
+
+
+class AsyncURLConf:
+    """The app's URLs with ASYNC_VIEWS turned on, regardless of the settings the suite runs with."""
+
+    urlpatterns = [path('', include((async_meter_patterns(), 'meters')))]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='async', password='test-pass-123')
+        Profile.objects.create(
+            user=self.user, first_name='A', last_name='B', email='a@example.com',
+            city='C', street='D', building='1', apartment=1, phone_number='1',
+        )
+        for day in range(12, -1, -1):
+            MeterAppTests.create_meter_record(
+                self.user, {f'meter_{i}': 1000 - day * (i + day % 3) for i in range(1, 6)}, days_ago=day,
+            )
+
+    async def get_both(self, url):
+        """Render ``url`` with the sync view and then with its async counterpart."""
+        with override_settings(ROOT_URLCONF='meter.urls'):
+            await sync_to_async(self.client.force_login)(self.user)
+            sync_response = await sync_to_async(self.client.get)(url)
+        await sync_to_async(cache.clear)()
+        await self.async_client.aforce_login(self.user)
+        async_response = await self.async_client.get(url)
+        return async_response, sync_response
+
+    async def test_async_dashboard_matches_sync_view(self):
+        async_response, sync_response = await self.get_both(reverse('meters:profile'))
+        self.assertEqual(async_response.status_code, 200)
+        self.assertIs(async_response.resolver_match.func.view_class, AsyncProfileListView)
+        for key in ('profile', 'recent_records', 'last_record', 'prev_record', 'summary_30', 'diff_rows'):
+            with self.subTest(key=key):
+                self.assertEqual(async_response.context[key], sync_response.context[key])
+
+    async def test_async_detail_matches_sync_view(self):
+        async_response, sync_response = await self.get_both(reverse('meters:detail') + '?period=90')
+        self.assertEqual(async_response.status_code, 200)
+        for key in ('meters', 'next_cursor', 'chart_labels', 'chart_meter_2', 'meter_summaries'):
+            with self.subTest(key=key):
+                self.assertEqual(list(async_response.context[key] or []), list(sync_response.context[key] or []))
+
+    async def test_async_submit_validates_and_saves(self):
+        response = await self.async_client.get(reverse('meters:create'))
+        self.assertEqual(response.status_code, 302)
+
+        await self.async_client.aforce_login(self.user)
+        latest = await AddMeterData.objects.filter(user=self.user).alatest('created')
+        response = await self.async_client.post(reverse('meters:create'), {f'meter_{i}': 0 for i in range(1, 6)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['last_record'], latest)
+        self.assertIn('meter_1', response.context['form'].errors)
+
+        values = {f'meter_{i}': getattr(latest, f'meter_{i}') + 3 for i in range(1, 6)}
+        response = await self.async_client.post(reverse('meters:create'), values)
+        self.assertRedirects(response, reverse('meters:profile'), fetch_redirect_response=False)
+        self.assertEqual(await AddMeterData.objects.filter(user=self.user).acount(), 14)
+
+
+class GenerateMeterDataTests(TestCase):
+    def test_command_creates_users_with_monotonic_history_and_derived_data(self):
+        out = io.StringIO()
+        call_command('generate_meter_data', users=2, years=0.1, seed=3, prefix='gen', stdout=out)
+        self.assertIn('Generated 74 readings for 2 users.', out.getvalue())
+
+        for user in User.objects.filter(username__startswith='gen-'):
+            self.assertTrue(Profile.objects.filter(user=user).exists())
+            rows = list(AddMeterData.objects.filter(user=user).order_by('created').values_list(*METER_FIELDS))
+            self.assertEqual(len(rows), 37)
+            for prev, current in zip(rows, rows[1:]):
+                errors = validate_meter_values(dict(zip(METER_FIELDS, current)), dict(zip(METER_FIELDS, prev)))
+                self.assertEqual(errors, {})
+            self.assertEqual(LatestReading.objects.get(user=user).record.meter_1, rows[-1][0])
+            self.assertEqual(MeterReading.objects.filter(meter__user=user).count(), 37 * 5)
+            self.assertTrue(ConsumptionRollup.objects.filter(user=user, period='month').exists())
+        self.assertTrue(self.client.login(username='gen-0', password='synthetic-pass'))
+
+    def test_same_seed_generates_the_same_readings(self):
+        now = timezone.now()
+        histories = []
+        for prefix in ('a', 'b'):
+            generate_meter_data(1, 0.05, prefix=prefix, seed=11, now=now)
+            readings = AddMeterData.objects.filter(user__username=f'{prefix}-0').order_by('created')
+            histories.append(list(readings.values_list('created', *METER_FIELDS)))
+        self.assertEqual(histories[0], histories[1])
+
+        generate_meter_data(1, 0.05, prefix='a', seed=11, now=now)
+        self.assertTrue(User.objects.filter(username='a-1').exists())
+
+
+async def slow_async_view(request):
+    await asyncio.sleep(SlowAsyncURLConf.delay)
+    return HttpResponse('done')
+
+
+class SlowAsyncURLConf:
+    delay = 0.3
+    urlpatterns = [path('slow/', slow_async_view, name='slow')]
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        REGISTRY.reset()
+        self.user = User.objects.create_user(username='timed', password='test-pass-123')
+        self.client.login(username='timed', password='test-pass-123')
+        MeterAppTests.create_meter_record(self.user, {f'meter_{i}': i for i in range(1, 6)}, days_ago=1)
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_server_timing_reports_queries_and_render_time(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('meters:detail'))
+
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'tpl', 'total'})
+        self.assertIn(f'desc="{len(queries)} queries"', timing['db'])
+        self.assertGreater(float(timing['tpl'].split('=')[1]), 0)
+
+    def test_metrics_endpoint_exposes_histograms_per_url_name(self):
+        self.client.get(reverse('meters:detail'))
+        self.client.get(reverse('meters:detail'), {'period': '7'})
+        self.client.get(reverse('meters:profile'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('meter_requests_total{view="meters:detail",method="GET",status="200"} 2', body)
+        self.assertIn('meter_request_duration_seconds_count{view="meters:detail"} 2', body)
+        self.assertIn('meter_request_db_queries_bucket{view="meters:profile",le="+Inf"} 1', body)
+        self.assertRegex(body, r'meter_response_size_bytes_sum\{view="meters:profile"\} [1-9]')
+
+    @override_settings(ROOT_URLCONF=SlowAsyncURLConf, SERVER_TIMING_HEADER=True)
+    async def test_async_requests_are_not_serialized(self):
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(self.async_client.get('/slow/') for _ in range(4)))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual([response.status_code for response in responses], [200] * 4)
+        self.assertLess(elapsed, 2 * SlowAsyncURLConf.delay)
+        self.assertIn('total;dur=', responses[0]['Server-Timing'])
+        self.assertIn('meter_requests_total{view="slow",method="GET",status="200"} 4', REGISTRY.render())
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_metrics_endpoint_is_restricted(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+class QueryGuardTests(QueryGuardMixin, TestCase):
+    def test_query_shape_ignores_literals_and_list_lengths(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = \'x\' LIMIT 21'),
+            query_shape('SELECT *  FROM t WHERE id IN (%s) AND name = \'y\' LIMIT 5'),
+        )
+        self.assertNotEqual(query_shape('SELECT a FROM t'), query_shape('SELECT b FROM t'))
+
+    def test_repeated_shapes_are_reported_per_request(self):
+        users = [User.objects.create_user(username=f'guard-{index}') for index in range(3)]
+        self.query_watcher.start_request(environ={'PATH_INFO': '/n-plus-one/'})
+        for user in users:
+            list(AddMeterData.objects.filter(user=user))
+        self.query_watcher.finish_request()
+        self.query_watcher.start_request(environ={'PATH_INFO': '/batched/'})
+        list(AddMeterData.objects.filter(user__in=users))
+        self.query_watcher.finish_request()
+
+        repeated = self.query_watcher.repeated(self.query_repeat_threshold)
+        self.assertEqual([(path, count) for path, _, count in repeated], [('/n-plus-one/', 3)])
+        self.query_watcher.requests.clear()
+
+    def test_base_teardown_runs_when_the_check_fails(self):
+        self.query_watcher.start_request(environ={'PATH_INFO': '/n-plus-one/'})
+        for index in range(3):
+            User.objects.filter(pk=index).exists()
+        self.query_watcher.finish_request()
+
+        with mock.patch.object(TestCase, 'tearDown') as base_teardown:
+            with self.assertRaisesMessage(AssertionError, 'possible N+1'):
+                self.tearDown()
+        base_teardown.assert_called_once_with()
+        self.query_watcher.requests.clear()
+
+    def test_query_count_growth_fails(self):
+        def set_rows(size):
+            for index in range(User.objects.count(), size):
+                User.objects.create_user(username=f'guard-{index}')
+
+        def per_row():
+            for user in User.objects.all():
+                AddMeterData.objects.filter(user=user).exists()
+
+        with self.assertRaisesMessage(AssertionError, 'Query count grows with the number of rows'):
+            self.assertQueryCountStable(set_rows, per_row)
+        self.assertQueryCountStable(set_rows, lambda: User.objects.filter(is_active=True).count(), sizes=(20, 40))
+
+
+class DatabaseSettingsTests(TestCase):
+    def test_sqlite_profile_enables_wal_and_connection_reuse(self):
+        config = database_settings({}, Path('/srv/meter'))
+
+        self.assertEqual(config['NAME'], str(Path('/srv/meter/db.sqlite3')))
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode=WAL', config['OPTIONS']['init_command'])
+        self.assertIn('PRAGMA synchronous=NORMAL', config['OPTIONS']['init_command'])
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+
+    def test_postgres_profile_reads_environment(self):
+        config = database_settings({
+            'DATABASE_ENGINE': 'postgres', 'DATABASE_NAME': 'readings', 'DATABASE_HOST': 'db',
+            'DATABASE_CONN_MAX_AGE': '300', 'DATABASE_HEALTH_CHECKS': 'false',
+        }, Path('/srv/meter'))
+
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((config['NAME'], config['HOST'], config['PORT']), ('readings', 'db', '5432'))
+        self.assertEqual(config['CONN_MAX_AGE'], 300)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+        with self.assertRaises(ImproperlyConfigured):
+            database_settings({'DATABASE_ENGINE': 'oracle'}, Path('/srv/meter'))
+
+
+class ConcurrentSubmitTests(TransactionTestCase):
+    THREADS = 4
+    SUBMITS = 5
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            message = 'Concurrent writers need a file-backed test database (see DATABASE_TEST_NAME).'
+            # A CI run must not pass without exercising the concurrent path.
+            if os.environ.get('CI'):
+                self.fail(message)
+            self.skipTest(message)
+
+    def test_parallel_submits_are_all_saved(self):
+        users = [User.objects.create_user(username=f'writer-{index}') for index in range(self.THREADS)]
+        errors = []
+
+        def submit(user):
+            try:
+                client = Client()
+                client.force_login(user)
+                for step in range(1, self.SUBMITS + 1):
+                    response = client.post(reverse('meters:create'), {key: step * 10 for key in METER_FIELDS})
+                    if response.status_code != 302:
+                        errors.append((user.username, step, response.status_code))
+            except Exception as exc:
+                errors.append((user.username, repr(exc)))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for user in users:
+            self.assertEqual(AddMeterData.objects.filter(user=user).count(), self.SUBMITS)
+            self.assertEqual(get_latest_reading(user).record.meter_1, self.SUBMITS * 10)
+
+
+class ChartDownsamplingTests(TestCase):
+    def test_lttb_keeps_endpoints_and_spikes(self):
+        flat = [10] * 500
+        spiky = [1] * 500
+        spiky[250] = 1000
+        points = downsample_indices([flat, spiky], 20)
+
+        self.assertEqual(len(points), 20)
+        self.assertEqual((points[0], points[-1]), (0, 499))
+        self.assertIn(250, points)
+        self.assertEqual(points, sorted(set(points)))
+        self.assertEqual(downsample_indices([[1, 2, 3]], 20), [0, 1, 2])
+        self.assertEqual(downsample_indices([flat], 0), list(range(500)))
+
+    @override_settings(CHART_MAX_POINTS=5)
+    def test_chart_series_are_thinned_but_totals_stay_exact(self):
+        cache.clear()
+        user = User.objects.create_user(username='downsampler', password='test-pass-123')
+        self.client.login(username='downsampler', password='test-pass-123')
+        for day in range(25, -1, -1):
+            MeterAppTests.create_meter_record(user, {key: (25 - day) * 4 for key in METER_FIELDS}, days_ago=day)
+
+        response = self.client.get(reverse('meters:detail'), {'period': '30'})
+        self.assertEqual(len(response.context['chart_labels']), 5)
+        self.assertEqual(len(response.context['chart_meter_3']), 5)
+        self.assertEqual(response.context['chart_total_points'], 25)
+        self.assertEqual(response.context['meter_summaries'][0]['total'], 100)
+
+        payload = self.client.get(reverse('meters:chart_api'), {'period': '30'}).json()
+        self.assertEqual(payload['total_points'], 25)
+        self.assertEqual(len(payload['labels']), 5)
+        self.assertEqual(payload['summaries'][0]['total'], 100)
+
+
+class StaticAssetTests(TestCase):
+    def setUp(self):
+        self.source = Path(tempfile.mkdtemp())
+        self.static_root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    def vendor(self, name, content):
+        target = self.source / VENDOR_ASSETS[name].path
+        target.parent.mkdir(parents=True)
+        target.write_text(content)
+
+    def render(self, source):
+        return Template('{% load vendor_assets %}' + source).render(Context())
+
+    def test_vendored_assets_are_served_locally(self):
+        html = self.render("{% vendor_stylesheet 'bootstrap-css' %}{% vendor_script 'chartjs' %}")
+        self.assertIn('href="/static/add_meters/vendor/bootstrap-5.3.3/bootstrap.min.css"', html)
+        self.assertIn('<script src="/static/add_meters/vendor/chart.js-4.4.0/chart.umd.js"></script>', html)
+        self.assertNotIn('cdn.jsdelivr.net', html)
+        for name, asset in VENDOR_ASSETS.items():
+            with self.subTest(name=name):
+                self.assertEqual(subresource_integrity(Path(finders.find(asset.path)).read_bytes()), asset.integrity)
+
+    def test_missing_assets_fall_back_to_the_pinned_cdn_copy(self):
+        with override_settings(
+            STATICFILES_DIRS=[self.source], STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        ):
+            html = self.render("{% vendor_stylesheet 'bootstrap-css' %}{% vendor_script 'chartjs' %}")
+            self.assertIn('https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/', html)
+            self.assertIn(f'integrity="{VENDOR_ASSETS["chartjs"].integrity}" crossorigin="anonymous"', html)
+
+            self.vendor('chartjs', 'window.Chart = function () {};')
+            asset_url.cache_clear()
+            html = self.render("{% vendor_script 'chartjs' %}")
+            self.assertEqual(html, '<script src="/static/add_meters/vendor/chart.js-4.4.0/chart.umd.js"></script>')
+
+    def test_asset_urls_are_resolved_once(self):
+        self.render("{% vendor_script 'chartjs' %}")
+        with mock.patch('add_meters.assets.finders.find') as find:
+            self.render("{% vendor_script 'chartjs' %}{% vendor_script 'chartjs' %}")
+        find.assert_not_called()
+
+    @override_settings(WHITENOISE_USE_FINDERS=True)
+    async def test_static_files_are_served_in_the_async_stack(self):
+        response = await self.async_client.get('/static/add_meters/vendor/chart.js-4.4.0/chart.umd.js')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertIn('javascript', response.headers['Content-Type'])
+
+    def test_collectstatic_writes_hashed_compressed_files_served_immutable(self):
+        self.vendor('chartjs', 'window.Chart = function () { return "chart"; };\n' * 50)
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+        }
+        with override_settings(
+            STATICFILES_DIRS=[self.source], STATIC_ROOT=self.static_root, STORAGES=storages, WHITENOISE_AUTOREFRESH=False,
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin'])
+            html = self.render("{% vendor_script 'chartjs' %}")
+            url = re.search(r'src="([^"]+)"', html).group(1)
+            self.assertRegex(url, r'/chart\.umd\.[0-9a-f]{12}\.js$')
+            self.assertTrue((self.static_root / (url.removeprefix('/static/') + '.gz')).exists())
+
+            response = Client().get(url, headers={'accept-encoding': 'gzip, br'})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn(response['Content-Encoding'], ('gzip', 'br'))
+
+    def test_vendor_command_rejects_files_that_do_not_match_the_pinned_hash(self):
+        pinned = Path(finders.find(VENDOR_ASSETS['chartjs'].path)).read_bytes()
+        app_static = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, app_static)
+        download = mock.MagicMock()
+        download.__enter__.return_value.read.return_value = b'tampered'
+        with mock.patch('add_meters.management.commands.vendor_assets.urlopen', return_value=download), \
+                mock.patch.object(django_apps.get_app_config('add_meters'), 'path', str(app_static)):
+            with self.assertRaisesMessage(CommandError, 'does not match the pinned hash'):
+                call_command('vendor_assets', 'bootstrap-js', stdout=io.StringIO())
+            self.assertFalse((app_static / 'static' / VENDOR_ASSETS['bootstrap-js'].path).exists())
+
+            download.__enter__.return_value.read.return_value = pinned
+            call_command('vendor_assets', 'chartjs', stdout=io.StringIO())
+            self.assertEqual((app_static / 'static' / VENDOR_ASSETS['chartjs'].path).read_bytes(), pinned)
+
+
+class TemplateFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='fragments', password='test-pass-123')
+        self.client.login(username='fragments', password='test-pass-123')
+        Profile.objects.create(
+            user=self.user, first_name='F', last_name='C', email='f@example.com',
+            city='A', street='B', building='1', apartment=1, phone_number='1',
+        )
+        for day in (3, 2, 1):
+            MeterAppTests.create_meter_record(self.user, {key: 100 - day for key in METER_FIELDS}, days_ago=day)
+
+    def poison(self, name, *vary_on):
+        key = make_template_fragment_key(name, [self.user.pk, *vary_on, get_data_version(self.user.pk)])
+        self.assertIsNotNone(cache.get(key))
+        cache.set(key, f'<p>cached {name}</p>')
+
+    def test_summary_fragments_are_reused_until_the_data_version_changes(self):
+        self.client.get(reverse('meters:profile'))
+        self.client.get(reverse('meters:detail'), {'period': '30'})
+        self.poison('profile-summary')
+        self.poison('detail-summary', '30')
+
+        self.assertContains(self.client.get(reverse('meters:profile')), 'cached profile-summary')
+        self.assertContains(self.client.get(reverse('meters:detail'), {'period': '30'}), 'cached detail-summary')
+        self.assertNotContains(self.client.get(reverse('meters:detail'), {'period': '7'}), 'cached detail-summary')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MeterAppTests.create_meter_record(self.user, {key: 200 for key in METER_FIELDS}, days_ago=0)
+        self.assertNotContains(self.client.get(reverse('meters:profile')), 'cached profile-summary')
+        self.assertNotContains(self.client.get(reverse('meters:detail'), {'period': '30'}), 'cached detail-summary')
+
+    @override_settings(TEMPLATE_FRAGMENT_CACHE_TIMEOUT=0)
+    def test_zero_timeout_disables_fragment_caching(self):
+        self.client.get(reverse('meters:profile'))
+        key = make_template_fragment_key('profile-summary', [self.user.pk, get_data_version(self.user.pk)])
+        self.assertIsNone(cache.get(key))
+
+    def test_templates_are_loaded_through_the_cached_loader(self):
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIsInstance(loader, CachedLoader)
+        self.assertEqual(len(loader.loaders), 2)
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cached-auth', password='test-pass-123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.login(username='cached-auth', password='test-pass-123')
+
+    def test_warm_requests_run_no_session_or_user_queries(self):
+        self.client.get(reverse('meters:create'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('meters:create'))
+
+        self.assertEqual(response.status_code, 200)
+        auth_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'django_session' in query['sql'] or 'auth_user' in query['sql']
+        ]
+        self.assertEqual(auth_queries, [])
+
+    def test_profile_sync_drops_the_cached_user(self):
+        backend = CachedModelBackend()
+        self.assertEqual(backend.get_user(self.user.pk).first_name, '')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('meters:create_profile'), {
+                'first_name': 'Ada', 'last_name': 'L', 'email': 'ada@example.com', 'city': 'A',
+                'street': 'B', 'building': '1', 'apartment': 1, 'phone_number': '1',
+            })
+        self.assertEqual(response.status_code, 302)
+        with self.assertNumQueries(1):
+            self.assertEqual(backend.get_user(self.user.pk).first_name, 'Ada')
+
+    def test_sessions_from_the_model_backend_stay_logged_in(self):
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'add_meters.auth.CachedModelBackend')
+        client = Client()
+        client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+        response = client.get(reverse('meters:create'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    async def test_deactivated_user_is_not_served_from_the_cache(self):
+        backend = CachedModelBackend()
+        self.assertIsNotNone(await backend.aget_user(self.user.pk))
+        cached = await cache.aget(f'meters:auth-user:{self.user.pk}')
+        cached.is_active = False
+        await cache.aset(f'meters:auth-user:{self.user.pk}', cached)
+        self.assertIsNone(await backend.aget_user(self.user.pk))
+
+
+@override_settings(JOB_RETRY_DELAY=10)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        use_temporary_media(self)
+        self.user = User.objects.create_user(username='queued', password='test-pass-123')
+
+    def test_failed_jobs_are_retried_with_backoff_then_marked_failed(self):
+        handler = mock.Mock(side_effect=RuntimeError('database went away'))
+        job = enqueue_job('report', self.user, {'group': 'city', 'months': 3})
+        with mock.patch.dict('add_meters.jobs.JOB_KINDS', {'report': (handler, 3)}), self.assertLogs('add_meters.jobs', 'ERROR'):
+            for attempt, delay in ((1, 10), (2, 20)):
+                before = timezone.now()
+                run_job(claim_next_job('test').pk)
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.attempts), (Job.QUEUED, attempt))
+                self.assertGreaterEqual(job.run_after, before + timedelta(seconds=delay))
+                self.assertEqual(job.message, f'Attempt {attempt} failed: RuntimeError: database went away')
+                self.assertIsNone(claim_next_job('test'))
+                Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+            run_job(claim_next_job('test').pk)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+
+            handler.side_effect = JobError('Nothing to report.')
+            other = enqueue_job('report', self.user, {'group': 'city', 'months': 3})
+            run_job(claim_next_job('test').pk)
+            other.refresh_from_db()
+            self.assertEqual((other.status, other.attempts, other.message), (Job.FAILED, 1, 'Nothing to report.'))
+
+    def test_jobs_left_running_by_a_dead_worker_are_requeued(self):
+        job = enqueue_job('report', self.user, {'group': 'city', 'months': 3})
+        claim_next_job('gone')
+        self.assertEqual(requeue_stale_jobs(timeout=60), 0)
+        Job.objects.filter(pk=job.pk).update(started=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_stale_jobs(timeout=60), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.QUEUED, ''))
+        self.assertIn('worker stopped', job.message)
+
+    def test_job_status_and_download_are_owner_only(self):
+        MeterAppTests.create_meter_record(self.user, {key: 5 for key in METER_FIELDS}, days_ago=1)
+        job = enqueue_job('export', self.user, {'format': 'csv', 'scope': 'mine'})
+        self.client.login(username='queued', password='test-pass-123')
+        status = self.client.get(reverse('meters:job_api', args=[job.pk])).json()
+        self.assertEqual((status['status'], status['download_url']), (Job.QUEUED, None))
+        self.assertContains(self.client.get(reverse('meters:job', args=[job.pk])), 'Waiting for a worker')
+        self.assertEqual(self.client.get(reverse('meters:job_download', args=[job.pk])).status_code, 404)
+
+        run_queued_jobs()
+        status = self.client.get(reverse('meters:job_api', args=[job.pk])).json()
+        self.assertEqual((status['status'], status['progress'], status['result']['rows']), (Job.DONE, 100, 1))
+        self.assertEqual(status['download_url'], reverse('meters:job_download', args=[job.pk]))
+
+        User.objects.create_user(username='nosy', password='test-pass-123')
+        self.client.login(username='nosy', password='test-pass-123')
+        for name in ('meters:job', 'meters:job_api', 'meters:job_download'):
+            self.assertEqual(self.client.get(reverse(name, args=[job.pk])).status_code, 404)
+
+
+class JobWorkerProcessTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Worker processes need a file-backed test database.')
+        use_temporary_media(self)
+        self.user = User.objects.create_user(username='parallel')
+
+    def test_worker_runs_jobs_in_separate_processes(self):
+        jobs = [enqueue_job('report', self.user, {'group': group, 'months': 3}) for group in ('city', 'street')]
+        self.assertEqual(Worker(processes=2, poll_interval=0.05).run(burst=True), 2)
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.DONE, job.message)
+            self.assertEqual(job.result['group'], job.params['group'])
+
+    def test_worker_kills_jobs_that_overrun_the_timeout(self):
+        job = enqueue_job('report', self.user, {'group': 'city', 'months': 3})
+        Job.objects.filter(pk=job.pk).update(max_attempts=1)
+        # Starting a fresh interpreter alone takes longer than this.
+        Worker(processes=1, timeout=0.01, poll_interval=0.05).run(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.message), (Job.FAILED, 'Timed out after 0.01 seconds.'))
@@ -1,12 +1,18 @@
 
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth.views import LogoutView
 
 from add_meters.views import ProfileListView, MeterFormView, MeterUpdateView, MeterDetailView, StartPageView, \
-    UserLoginView, RegisterPage, ProfileCreateView, ProfileUpdateView
+    UserLoginView, RegisterPage, ProfileCreateView, ProfileUpdateView, MeterReadingsView, \
+    ChartDataView, ReadingImportView, ReadingExportView, ReadingBatchApiView, \
+    JobDetailView, JobStatusView, JobDownloadView, AsyncProfileListView, AsyncMeterFormView, AsyncMeterDetailView
 
 app_name = 'meters'
 
+if settings.ASYNC_VIEWS:
+    ProfileListView, MeterFormView, MeterDetailView = AsyncProfileListView, AsyncMeterFormView, AsyncMeterDetailView
+
 
 urlpatterns = [
     path('login/', UserLoginView.as_view(), name='login'),
@@ -17,6 +23,14 @@ urlpatterns = [
     path('add/', MeterFormView.as_view(), name='create'),
     path('update/', MeterUpdateView.as_view(), name='update'),
     path('detail/', MeterDetailView.as_view(), name='detail'),
+    path('detail/readings/', MeterReadingsView.as_view(), name='readings'),
+    path('export/', ReadingExportView.as_view(), name='export'),
+    path('import/', ReadingImportView.as_view(), name='import'),
+    path('jobs/<int:pk>/', JobDetailView.as_view(), name='job'),
+    path('jobs/<int:pk>/download/', JobDownloadView.as_view(), name='job_download'),
+    path('api/chart/', ChartDataView.as_view(), name='chart_api'),
+    path('api/readings/', ReadingBatchApiView.as_view(), name='readings_api'),
+    path('api/jobs/<int:pk>/', JobStatusView.as_view(), name='job_api'),
     path('create_profile/', ProfileCreateView.as_view(), name='create_profile'),
     path('profile/edit/', ProfileUpdateView.as_view(), name='update_profile'),
 
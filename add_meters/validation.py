@@ -0,0 +1,24 @@
+METER_FIELDS = ('meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5')
+
+
+def validate_meter_values(values, prev_values=None):
+    """Return ``{field_name: message}`` for readings that break the meter rules.
+
+    ``values`` and ``prev_values`` map meter field names to integers (or ``None`` for a
+    missing value); ``prev_values`` is the user's previous reading, if any.
+    """
+    errors = {}
+
+    for field_name in METER_FIELDS:
+        value = values.get(field_name)
+        if value is not None and value < 0:
+            errors[field_name] = 'Value must be zero or positive.'
+
+    if prev_values:
+        for i, field_name in enumerate(METER_FIELDS, start=1):
+            prev_meter = prev_values[field_name]
+            new_meter = values.get(field_name)
+            if new_meter is not None and new_meter < prev_meter:
+                errors[field_name] = f'Meter {i} must be greater than or equal to {prev_meter}.'
+
+    return errors
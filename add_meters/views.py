@@ -1,18 +1,45 @@
+import asyncio
+import functools
+import json
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView
+from django.conf import settings
 from django.contrib import messages
-from collections import defaultdict
 from datetime import timedelta
-from django.shortcuts import render, redirect
-from django.urls import reverse_lazy
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.template.response import TemplateResponse
+from django.urls import reverse, reverse_lazy
 from django.views import View
 from django.views.generic import ListView, UpdateView, TemplateView, FormView, CreateView
 from django.utils import timezone
-
-from .forms import AddMeterForm, AddMeterUpdateForm
-from .models import AddMeterData, Profile
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.formats import date_format
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+
+from .analytics import downsample_indices, summarize_buckets
+from .analytics_cache import cached_analytics, fragment_cache_context
+from .dashboard import DashboardData
+from .exporters import EXPORT_FORMATS
+from .forms import AddMeterForm, AddMeterUpdateForm, ReadingImportForm
+from .gateway import MAX_BATCH_SIZE, authenticate_gateway, submit_readings
+from .importers import guess_format
+from .jobs import enqueue_job
+from .latest import StaleReadingError, aget_latest_reading, claim_latest_reading, get_latest_reading
+from .meters import extra_meters_query
+from .models import AddMeterData, AnomalyState, ConsumptionRollup, Job, Profile
+from .pagination import InvalidCursor, akeyset_page, keyset_page
+from .series import bucket_series, format_bucket_label, load_user_series, range_days as series_range_days
+from .validation import METER_FIELDS
 
 
 def sync_user_identity_from_profile(user, profile):
@@ -29,91 +56,78 @@ class StartPageView(TemplateView):
 class ProfileListView(LoginRequiredMixin, TemplateView):
     template_name = 'add_meters/profile.html'
     meter_keys = ['meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5']
-    meter_labels = {
-        'meter_1': 'Meter 1',
-        'meter_2': 'Meter 2',
-        'meter_3': 'Meter 3',
-        'meter_4': 'Meter 4',
-        'meter_5': 'Meter 5',
-    }
 
-    @staticmethod
-    def _get_range_days(records):
-        if not records:
-            return 1
-        return max(1, (records[-1].created.date() - records[0].created.date()).days + 1)
-
-    def _get_last_and_prev_records(self):
-        records = AddMeterData.objects.filter(user=self.request.user).order_by('-created')[:2]
-        last_record = records[0] if len(records) > 0 else None
-        prev_record = records[1] if len(records) > 1 else None
-        return last_record, prev_record
-
-    def _get_30_day_consumption_totals(self):
-        records_30 = list(
-            AddMeterData.objects.filter(
-                user=self.request.user,
-                created__gte=timezone.now() - timedelta(days=30),
-            ).order_by('created')
-        )
-        totals_30 = {key: 0 for key in self.meter_keys}
-
-        if len(records_30) > 1:
-            prev_item = records_30[0]
-            for item in records_30[1:]:
-                for key in self.meter_keys:
-                    totals_30[key] += getattr(item, key) - getattr(prev_item, key)
-                prev_item = item
-
-        return totals_30, self._get_range_days(records_30)
+    STATUS_LABELS = dict(AnomalyState.STATUS_CHOICES)
+    STATUS_CLASSES = {
+        AnomalyState.NORMAL: 'success',
+        AnomalyState.HIGH: 'warning',
+        AnomalyState.LOW: 'info',
+        AnomalyState.DECREASE: 'danger',
+        AnomalyState.LEAK: 'danger',
+    }
 
-    def _build_30_day_summary(self, totals_30, range_days_30):
+    def _build_30_day_summary(self, window, range_days_30):
         return [
             {
-                'label': self.meter_labels[key],
-                'total': totals_30[key],
-                'avg_per_day': round(totals_30[key] / range_days_30, 2),
+                'label': item.meter.label,
+                'total': item.total(),
+                'avg_per_day': round(item.total() / range_days_30, 2),
             }
-            for key in self.meter_keys
+            for item in window
         ]
 
-    def _build_diff_rows(self, diffs, totals_30, range_days_30):
+    def _build_diff_rows(self, series, window, range_days_30, statuses=None):
+        """Label the latest diff per meter from its anomaly state, or fixed thresholds during warm-up."""
+        statuses = statuses or {}
         rows = []
-        for key in self.meter_keys:
-            avg = round(totals_30[key] / range_days_30, 2) if range_days_30 else 0
-            diff = diffs[key]
-            if diff < 0:
-                status_label = 'Decrease'
-                status_class = 'danger'
+        for item, window_item in zip(series, window):
+            avg = round(window_item.total() / range_days_30, 2) if range_days_30 else 0
+            diff = item.last_delta()
+            anomaly = statuses.get(item.meter.position)
+            if anomaly is not None:
+                status = anomaly.status
+            elif diff < 0:
+                status = AnomalyState.DECREASE
             elif avg > 0 and diff > avg * 1.5:
-                status_label = 'High spike'
-                status_class = 'warning'
+                status = AnomalyState.HIGH
             elif avg > 0 and diff < avg * 0.7:
-                status_label = 'Low usage'
-                status_class = 'info'
+                status = AnomalyState.LOW
             else:
-                status_label = 'Normal'
-                status_class = 'success'
+                status = AnomalyState.NORMAL
 
             rows.append({
-                'label': self.meter_labels[key],
+                'label': item.meter.label,
                 'value': diff,
-                'status_label': status_label,
-                'status_class': status_class,
+                'status_label': self.STATUS_LABELS[status],
+                'status_class': self.STATUS_CLASSES[status],
             })
         return rows
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(self.get_dashboard_context(DashboardData(self.request.user).load()))
+        return context
 
-        context['profile'] = Profile.objects.filter(user=self.request.user).first()
-        context['recent_records'] = AddMeterData.objects.filter(user=self.request.user).order_by('-created')[:5]
-        last_record, prev_record = self._get_last_and_prev_records()
+    def get_dashboard_context(self, dashboard):
+        context = {}
+        context['profile'] = dashboard.profile
+        context['recent_records'] = dashboard.recent_records
+        last_record, prev_record = dashboard.last_record, dashboard.prev_record
         context['last_record'] = last_record
         context['prev_record'] = prev_record
 
-        totals_30, range_days_30 = self._get_30_day_consumption_totals()
-        context['summary_30'] = self._build_30_day_summary(totals_30, range_days_30)
+        user_id = self.request.user.pk
+        context.update(fragment_cache_context(user_id))
+
+        @functools.cache
+        def get_window():
+            window = [item.since(dashboard.window_start) for item in dashboard.get_series()]
+            return window, series_range_days(window) or 1
+
+        context['summary_30'] = cached_analytics(
+            user_id, 'summary_30', '30',
+            lambda: self._build_30_day_summary(*get_window()),
+        )
 
         if last_record and prev_record:
             date_now = timezone.localtime()
@@ -130,45 +144,56 @@ class ProfileListView(LoginRequiredMixin, TemplateView):
             context['diff_meter_5'] = diff_meter_5
             context['date_now'] = date_now
 
-            diffs = {
-                'meter_1': diff_meter_1,
-                'meter_2': diff_meter_2,
-                'meter_3': diff_meter_3,
-                'meter_4': diff_meter_4,
-                'meter_5': diff_meter_5,
-            }
-            context['diff_rows'] = self._build_diff_rows(diffs, totals_30, range_days_30)
+            context['diff_rows'] = cached_analytics(
+                user_id, 'diff_rows', '30',
+                lambda: self._build_diff_rows(
+                    dashboard.get_series(), *get_window(),
+                    statuses=dashboard.get_statuses(),
+                ),
+            )
 
         return context
 
 
 class MeterFormView(LoginRequiredMixin, View):
-    @staticmethod
-    def get_last_record_for_user(user):
-        return AddMeterData.objects.filter(user=user).order_by('-created').first()
+    stale_message = 'Another reading was saved in the meantime. Please check the values and submit again.'
 
-    def get(self, request):
-        form = AddMeterForm(user=request.user)
+    def render_form(self, request, form, latest):
         context = {
             'form': form,
-            'last_record': self.get_last_record_for_user(request.user),
+            'last_record': latest.record if latest else None,
         }
-        return render(request, 'add_meters/create.html', context)
+        return TemplateResponse(request, 'add_meters/create.html', context)
+
+    def save_reading(self, request, form, latest):
+        """Store a validated form; raises ``StaleReadingError`` if another reading won the race."""
+        form.instance.user = request.user
+        with transaction.atomic():
+            claim_latest_reading(request.user, latest)
+            form.save()
+
+    def get_stale_form(self, request, latest):
+        form = AddMeterForm(user=request.user, data=request.POST, latest=latest)
+        form.is_valid()
+        form.add_error(None, self.stale_message)
+        return form
+
+    def get(self, request):
+        latest = get_latest_reading(request.user)
+        return self.render_form(request, AddMeterForm(user=request.user, latest=latest), latest)
 
     def post(self, request):
-        form = AddMeterForm(user=request.user, data=request.POST)
+        latest = get_latest_reading(request.user)
+        form = AddMeterForm(user=request.user, data=request.POST, latest=latest)
         if form.is_valid():
-            form.save(commit=False)
-            form.instance.user = request.user
-            form.save()
+            try:
+                self.save_reading(request, form, latest)
+            except StaleReadingError:
+                latest = get_latest_reading(request.user)
+                return self.render_form(request, self.get_stale_form(request, latest), latest)
             messages.success(request, 'Record added successfully.')
             return redirect('meters:profile')
-        else:
-            context = {
-                'form': form,
-                'last_record': self.get_last_record_for_user(request.user),
-            }
-            return render(request, 'add_meters/create.html', context)
+        return self.render_form(request, form, latest)
 
 
 class MeterUpdateView(LoginRequiredMixin, UpdateView):
@@ -179,23 +204,27 @@ class MeterUpdateView(LoginRequiredMixin, UpdateView):
 
     def get_object(self, queryset=None):
         """if qs is empty, show error 404"""
-        try:
-            return AddMeterData.objects.filter(user=self.request.user).latest('created')
-        except AddMeterData.DoesNotExist:
-            return None
+        self.latest = get_latest_reading(self.request.user)
+        return self.latest.record if self.latest else None
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs['user'] = self.request.user
+        kwargs['latest'] = self.latest
         return kwargs
 
+    def form_valid(self, form):
+        try:
+            with transaction.atomic():
+                claim_latest_reading(self.request.user, self.latest)
+                response = super().form_valid(form)
+        except StaleReadingError:
+            form.add_error(None, MeterFormView.stale_message)
+            return self.form_invalid(form)
+        return response
 
 
-class MeterDetailView(LoginRequiredMixin, ListView):
-    model = AddMeterData
-    template_name = 'add_meters/detail.html'
-    context_object_name = 'meters'
-
+class PeriodFilterMixin:
     PERIOD_OPTIONS = (
         ('7', 'Last 7 days'),
         ('30', 'Last 30 days'),
@@ -210,6 +239,21 @@ class MeterDetailView(LoginRequiredMixin, ListView):
         allowed = {value for value, _ in self.PERIOD_OPTIONS}
         return period if period in allowed else '30'
 
+    def get_period_start(self):
+        period = self.get_selected_period()
+        if period == 'all':
+            return None
+        return timezone.now() - timedelta(days=int(period))
+
+    def get_period_queryset(self):
+        qs = AddMeterData.objects.filter(user=self.request.user)
+        start = self.get_period_start()
+        if start is not None:
+            qs = qs.filter(created__gte=start)
+        return qs.order_by('-created')
+
+
+class ChartContextMixin(PeriodFilterMixin):
     def get_bucket_type(self):
         period = self.get_selected_period()
         if period == 'all':
@@ -221,86 +265,323 @@ class MeterDetailView(LoginRequiredMixin, ListView):
             return 'week'
         return 'month'
 
+    def _get_range_days(self, queryset):
+        bounds = queryset.aggregate(first=Min('created'), last=Max('created'))
+        if bounds['first'] is None:
+            return 0
+        return max(1, (bounds['last'].date() - bounds['first'].date()).days + 1)
+
+    def _get_series_buckets(self):
+        """Bucket the period's readings of every meter of the user."""
+        series = load_user_series(self.request.user, since=self.get_period_start())
+        return series, bucket_series(series, self.get_bucket_type()), series_range_days(series)
+
+    def _get_rollup_buckets(self):
+        """Read the all-time history of meters 1-5 from the monthly rollups maintained on write."""
+        # Extra meters have no rollups; their (usually short) series are bucketed here.
+        series = load_user_series(self.request.user, min_position=len(METER_FIELDS) + 1)
+        rollups = ConsumptionRollup.objects.filter(
+            user=self.request.user,
+            period='month',
+        ).values_list('bucket_start', *METER_FIELDS)
+
+        keys = [item.key for item in series]
+        buckets = {}
+        for bucket_start, *values in rollups:
+            buckets[bucket_start] = dict.fromkeys(keys, 0)
+            buckets[bucket_start].update(zip(METER_FIELDS, values))
+        extra = [item for item in series if item.meter.position > len(METER_FIELDS)]
+        for bucket_start, values in bucket_series(extra, 'month'):
+            buckets.setdefault(bucket_start, dict.fromkeys(keys, 0)).update(values)
+        return series, sorted(buckets.items()), self._get_range_days(self.get_period_queryset())
+
+    def get_chart_context(self):
+        return cached_analytics(
+            self.request.user.pk, 'chart', self.get_selected_period(), self._build_chart_context,
+        )
+
+    def _build_chart_context(self):
+        if self.get_selected_period() == 'all':
+            series, buckets, range_days = self._get_rollup_buckets()
+        else:
+            series, buckets, range_days = self._get_series_buckets()
+        bucket_type = self.get_bucket_type()
+        keys = [item.key for item in series]
+
+        # Summaries use every bucket; only the plotted series are thinned to CHART_MAX_POINTS.
+        per_meter = summarize_buckets([values for _, values in buckets], range_days, keys)
+        columns = {key: [values[key] for _, values in buckets] for key in keys}
+        points = downsample_indices(list(columns.values()), settings.CHART_MAX_POINTS)
+
+        context = {}
+        context['chart_labels'] = [format_bucket_label(buckets[index][0], bucket_type) for index in points]
+        context['chart_series'] = [
+            {'key': item.key, 'label': item.meter.label, 'data': [columns[item.key][index] for index in points]}
+            for item in series
+        ]
+        for item in context['chart_series']:
+            context[f'chart_{item["key"]}'] = item['data']
+        context['chart_total_points'] = len(buckets)
+        context['chart_title'] = 'Consumption by period'
+
+        summaries = [
+            {'label': item.meter.label, **per_meter[item.key]}
+            for item in series
+        ]
+        context['meter_summaries'] = summaries
+
+        return context
+
+
+class MeterDetailView(LoginRequiredMixin, ChartContextMixin, ListView):
+    model = AddMeterData
+    template_name = 'add_meters/detail.html'
+    context_object_name = 'meters'
+    readings_page_size = 50
+
     def get_queryset(self):
-        qs = AddMeterData.objects.filter(user=self.request.user)
-        period = self.get_selected_period()
-        if period != 'all':
-            days = int(period)
-            start = timezone.now() - timedelta(days=days)
-            qs = qs.filter(created__gte=start)
-        return qs.order_by('-created')
+        return self.get_period_queryset()
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        # The table is paged by keyset; the chart aggregates the whole period separately.
+        page, next_cursor = keyset_page(self.object_list, page_size=self.readings_page_size)
+        return self.get_detail_context(page, next_cursor, self.get_chart_context(), **kwargs)
+
+    def get_detail_context(self, page, next_cursor, chart_context, **kwargs):
+        context = super().get_context_data(object_list=page, **kwargs)
+        context['next_cursor'] = next_cursor
         context['period_options'] = self.PERIOD_OPTIONS
         context['selected_period'] = self.get_selected_period()
+        context.update(chart_context)
+        context.update(fragment_cache_context(self.request.user.pk))
+        return context
+
+
+def _get_chart_validators(request):
+    # Shared by the ETag and Last-Modified callbacks so the aggregate runs once per request.
+    if not hasattr(request, '_chart_validators'):
+        request._chart_validators = AddMeterData.objects.filter(user=request.user).aggregate(
+            last_updated=Max('updated'),
+            readings=Count('pk'),
+        )
+    return request._chart_validators
+
+
+def chart_etag(request):
+    validators = _get_chart_validators(request)
+    last_updated = validators['last_updated'].timestamp() if validators['last_updated'] else 0
+    period = request.GET.get('period', '30')
+    # Rolling windows move with the calendar, so only "all" is stable across days.
+    day = '' if period == 'all' else timezone.localdate().isoformat()
+    return f'{request.user.pk}-{validators["readings"]}-{last_updated:.6f}-{period}-{day}'
+
 
-        chart_qs = list(self.object_list.order_by('created'))
-        meter_keys = ['meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5']
-        meter_labels = {
-            'meter_1': 'Meter 1',
-            'meter_2': 'Meter 2',
-            'meter_3': 'Meter 3',
-            'meter_4': 'Meter 4',
-            'meter_5': 'Meter 5',
+def chart_last_modified(request):
+    return _get_chart_validators(request)['last_updated']
+
+
+@method_decorator(condition(etag_func=chart_etag, last_modified_func=chart_last_modified), name='get')
+class ChartDataView(LoginRequiredMixin, ChartContextMixin, View):
+    def get(self, request):
+        chart = self.get_chart_context()
+        payload = {
+            'period': self.get_selected_period(),
+            'bucket_type': self.get_bucket_type(),
+            'title': chart['chart_title'],
+            'total_points': chart['chart_total_points'],
+            'labels': chart['chart_labels'],
+            'series': chart['chart_series'],
+            'summaries': chart['meter_summaries'],
         }
+        response = JsonResponse(payload)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
-        bucket_type = self.get_bucket_type()
-        bucket_order = []
-        bucket_values = defaultdict(lambda: {key: 0 for key in meter_keys})
-
-        prev_record = None
-        for item in chart_qs:
-            if prev_record is None:
-                prev_record = item
-                continue
-
-            if bucket_type == 'day':
-                bucket_key = item.created.strftime('%d.%m.%Y')
-            elif bucket_type == 'week':
-                iso_year, iso_week, _ = item.created.isocalendar()
-                bucket_key = f'W{iso_week:02d} {iso_year}'
-            else:
-                bucket_key = item.created.strftime('%m.%Y')
 
-            if bucket_key not in bucket_values:
-                bucket_order.append(bucket_key)
+class MeterReadingsView(LoginRequiredMixin, PeriodFilterMixin, View):
+    page_size = MeterDetailView.readings_page_size
+    meter_keys = ('meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5')
 
-            for key in meter_keys:
-                bucket_values[bucket_key][key] += getattr(item, key) - getattr(prev_record, key)
+    def get(self, request):
+        try:
+            records, next_cursor = keyset_page(
+                self.get_period_queryset(),
+                cursor=request.GET.get('cursor'),
+                page_size=self.page_size,
+            )
+        except InvalidCursor as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+
+        results = [
+            {
+                'id': item.pk,
+                'created': item.created.isoformat(),
+                'created_display': date_format(timezone.localtime(item.created), 'd.m.Y H:i'),
+                **{key: getattr(item, key) for key in self.meter_keys},
+            }
+            for item in records
+        ]
+        return JsonResponse({'results': results, 'next_cursor': next_cursor})
 
-            prev_record = item
 
-        context['chart_labels'] = bucket_order
-        context['chart_meter_1'] = [bucket_values[label]['meter_1'] for label in bucket_order]
-        context['chart_meter_2'] = [bucket_values[label]['meter_2'] for label in bucket_order]
-        context['chart_meter_3'] = [bucket_values[label]['meter_3'] for label in bucket_order]
-        context['chart_meter_4'] = [bucket_values[label]['meter_4'] for label in bucket_order]
-        context['chart_meter_5'] = [bucket_values[label]['meter_5'] for label in bucket_order]
-        context['chart_title'] = 'Consumption by period'
+class ReadingImportView(LoginRequiredMixin, FormView):
+    template_name = 'add_meters/import.html'
+    form_class = ReadingImportForm
 
-        summaries = []
-        range_days = 0
-        if chart_qs:
-            first_day = chart_qs[0].created.date()
-            last_day = chart_qs[-1].created.date()
-            range_days = max(1, (last_day - first_day).days + 1)
-
-        for key in meter_keys:
-            total = sum(bucket_values[label][key] for label in bucket_order)
-            trend = 0
-            if len(bucket_order) >= 2:
-                trend = bucket_values[bucket_order[-1]][key] - bucket_values[bucket_order[-2]][key]
-            avg_per_day = round(total / range_days, 2) if range_days else 0
-            summaries.append({
-                'label': meter_labels[key],
-                'total': total,
-                'trend': trend,
-                'avg_per_day': avg_per_day,
-            })
-        context['meter_summaries'] = summaries
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        fmt = form.cleaned_data['format'] or guess_format(upload.name)
+        job = enqueue_job('import', self.request.user, {'format': fmt, 'filename': upload.name}, input_file=upload)
+        return redirect('meters:job', pk=job.pk)
 
-        return context
+
+class ReadingExportView(LoginRequiredMixin, View):
+    http_method_names = ['post']
+
+    def post(self, request):
+        fmt = request.POST.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return HttpResponseBadRequest('Unsupported export format.')
+        scope = 'all' if request.POST.get('scope') == 'all' else 'mine'
+        if scope == 'all' and not request.user.is_staff:
+            raise PermissionDenied
+
+        job = enqueue_job('export', request.user, {'format': fmt, 'scope': scope})
+        return redirect('meters:job', pk=job.pk)
+
+
+class JobMixin(LoginRequiredMixin):
+    """Jobs are only visible to the user who started them."""
+
+    def get_job(self):
+        return get_object_or_404(Job, pk=self.kwargs['pk'], user=self.request.user)
+
+
+def job_status(job):
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'attempts': job.attempts,
+        'finished': job.is_finished,
+        'result': job.result if job.status == Job.DONE else None,
+        'download_url': reverse('meters:job_download', args=[job.pk]) if job.result_file else None,
+    }
+
+
+class JobDetailView(JobMixin, View):
+    def get(self, request, pk):
+        job = self.get_job()
+        return render(request, 'add_meters/job.html', {'job': job})
+
+
+class JobStatusView(JobMixin, View):
+    def get(self, request, pk):
+        response = JsonResponse(job_status(self.get_job()))
+        patch_cache_control(response, no_store=True)
+        return response
+
+
+class JobDownloadView(JobMixin, View):
+    def get(self, request, pk):
+        job = self.get_job()
+        if job.status != Job.DONE or not job.result_file:
+            raise Http404
+        fmt = job.params['format']
+        return FileResponse(
+            job.result_file.open('rb'), as_attachment=True, filename=job.result['filename'],
+            content_type=EXPORT_FORMATS[fmt],
+        )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ReadingBatchApiView(View):
+    """Batch submission endpoint for gateways, authenticated with ``Authorization: Bearer <key>``."""
+
+    http_method_names = ['post']
+
+    def post(self, request):
+        token = authenticate_gateway(request)
+        if token is None:
+            response = JsonResponse({'error': 'Invalid or missing gateway token.'}, status=401)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'Request body must be JSON.'}, status=400)
+        items = payload.get('readings') if isinstance(payload, dict) else None
+        if not isinstance(items, list) or not items:
+            return JsonResponse({'error': '"readings" must be a non-empty list.'}, status=400)
+        if len(items) > MAX_BATCH_SIZE:
+            return JsonResponse({'error': f'At most {MAX_BATCH_SIZE} readings per request.'}, status=413)
+
+        results = submit_readings(token, items)
+        created = sum(1 for item in results if item['status'] == 'created')
+        return JsonResponse({'created': created, 'rejected': len(results) - created, 'results': results})
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """LoginRequiredMixin for async views: resolves the user with ``auser()`` instead of a sync query."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Later sync code (templates, forms) reads request.user; give it the already loaded user.
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+class AsyncProfileListView(AsyncLoginRequiredMixin, ProfileListView):
+    async def get(self, request, *args, **kwargs):
+        dashboard = await DashboardData(request.user).aload()
+        context = self.get_context_data(**kwargs)
+        context.update(self.get_dashboard_context(dashboard))
+        return self.render_to_response(context)
+
+    def get_context_data(self, **kwargs):
+        # Skip ProfileListView's sync loading; ``get`` adds the dashboard context.
+        return super(ProfileListView, self).get_context_data(**kwargs)
+
+
+class AsyncMeterDetailView(AsyncLoginRequiredMixin, MeterDetailView):
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        # The chart context is built by the sync helpers shared with MeterDetailView.
+        (page, next_cursor), chart_context = await asyncio.gather(
+            akeyset_page(self.object_list, page_size=self.readings_page_size),
+            sync_to_async(self.get_chart_context)(),
+        )
+        return self.render_to_response(self.get_detail_context(page, next_cursor, chart_context))
+
+
+class AsyncMeterFormView(AsyncLoginRequiredMixin, MeterFormView):
+    async def get_form(self, request, latest, **kwargs):
+        extra_meters = []
+        if getattr(latest, 'has_extra_meters', True):
+            extra_meters = [meter async for meter in extra_meters_query(request.user)]
+        return AddMeterForm(user=request.user, latest=latest, extra_meters=extra_meters, **kwargs)
+
+    async def get(self, request):
+        latest = await aget_latest_reading(request.user)
+        return self.render_form(request, await self.get_form(request, latest), latest)
+
+    async def post(self, request):
+        latest = await aget_latest_reading(request.user)
+        form = await self.get_form(request, latest, data=request.POST)
+        if await sync_to_async(form.is_valid)():
+            try:
+                await sync_to_async(self.save_reading)(request, form, latest)
+            except StaleReadingError:
+                latest = await aget_latest_reading(request.user)
+                form = await sync_to_async(self.get_stale_form)(request, latest)
+                return self.render_form(request, form, latest)
+            messages.success(request, 'Record added successfully.')
+            return redirect('meters:profile')
+        return self.render_form(request, form, latest)
 
 
 class UserLoginView(LoginView):
@@ -0,0 +1,56 @@
+"""Throughput of the consumption analytics engine on large synthetic series.
+
+Compares the NumPy path with the pure-Python fallback (no database involved).
+
+Usage: python benchmarks/bench_analytics.py [--readings 1000000]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+
+from common import setup_django, timed
+
+
+def synthetic_series(readings, meters=5):
+    rng = random.Random(42)
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    created = [start + timedelta(minutes=30 * index) for index in range(readings)]
+    values = {}
+    for position in range(1, meters + 1):
+        running = 0
+        column = []
+        for _ in range(readings):
+            running += rng.randint(0, 50)
+            column.append(running)
+        values[f'meter_{position}'] = column
+    return created, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readings', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from add_meters.analytics import HAS_NUMPY, ReadingColumns
+
+    created, values = synthetic_series(args.readings)
+    backends = [False, True] if HAS_NUMPY else [False]
+    if not HAS_NUMPY:
+        print('NumPy is not installed; only the pure-Python path is measured.')
+
+    for vectorized in backends:
+        name = 'numpy' if vectorized else 'python'
+        with timed(f'[{name}] load columns', args.readings, 'readings'):
+            columns = ReadingColumns(created, values, vectorized=vectorized)
+        with timed(f'[{name}] deltas', args.readings, 'readings'):
+            columns.deltas()
+        with timed(f'[{name}] totals', args.readings, 'readings'):
+            columns.totals()
+        for bucket_type in ('day', 'week', 'month'):
+            with timed(f'[{name}] {bucket_type} bucket sums', args.readings, 'readings'):
+                columns.bucket_sums(bucket_type)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Requests/sec of the dashboard and history pages under WSGI and ASGI, with sync and async views.
+
+Requests go through Django's WSGI and ASGI handlers in-process (the same entry points
+gunicorn and uvicorn call), so the numbers compare the handler and view stacks without
+network noise. WSGI requests run on a thread pool; ASGI requests run concurrently on
+one event loop.
+
+Usage: python benchmarks/bench_asgi.py [--users 20] [--days 365] [--requests 400] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from common import benchmark_database, setup_django
+
+PAGES = ('/profile/', '/detail/?period=90')
+
+
+def create_history(users, days):
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+
+    from add_meters.importers import import_readings
+    from add_meters.models import Profile
+
+    start = timezone.now() - timedelta(days=days)
+    for index in range(users):
+        user = User.objects.create_user(username=f'load-{index}', password='bench-pass-123')
+        Profile.objects.create(
+            user=user, first_name='Load', last_name=str(index), email='load@example.com',
+            city='Bench', street='Main', building='1', apartment=index + 1, phone_number='0',
+        )
+        lines = ['created,meter_1,meter_2,meter_3,meter_4,meter_5']
+        for day in range(days):
+            lines.append(f'{(start + timedelta(days=day)).isoformat()},{day * 3},{day * 2},{day * 5},{day},{day * 4}')
+        import_readings(user, lines)
+    return [f'load-{index}' for index in range(users)]
+
+
+def async_urlconf():
+    from django.urls import include, path
+
+    from add_meters import urls
+    from add_meters.views import AsyncMeterDetailView, AsyncMeterFormView, AsyncProfileListView
+
+    swapped = {'profile': AsyncProfileListView, 'create': AsyncMeterFormView, 'detail': AsyncMeterDetailView}
+    patterns = [
+        path(str(pattern.pattern), swapped[pattern.name].as_view(), name=pattern.name)
+        if pattern.name in swapped else pattern
+        for pattern in urls.urlpatterns
+    ]
+    return type('AsyncURLConf', (), {'urlpatterns': [path('', include((patterns, 'meters')))]})
+
+
+def report(label, latencies, elapsed):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f'{label}: {len(latencies) / elapsed:,.0f} req/s, '
+        f'p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms'
+    )
+
+
+def run_wsgi(usernames, total, concurrency):
+    from django.test import Client
+
+    def worker(index):
+        client = Client()
+        client.login(username=usernames[index % len(usernames)], password='bench-pass-123')
+        latencies = []
+        for number in range(index, total, concurrency):
+            started = time.perf_counter()
+            response = client.get(PAGES[number % len(PAGES)])
+            assert response.status_code == 200, response.status_code
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    return [value for latencies in results for value in latencies], time.perf_counter() - started
+
+
+async def run_asgi(usernames, total, concurrency):
+    from django.test import AsyncClient
+
+    async def worker(index):
+        client = AsyncClient()
+        await client.alogin(username=usernames[index % len(usernames)], password='bench-pass-123')
+        latencies = []
+        for number in range(index, total, concurrency):
+            started = time.perf_counter()
+            response = await client.get(PAGES[number % len(PAGES)])
+            assert response.status_code == 200, response.status_code
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return [value for latencies in results for value in latencies], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import override_settings
+
+    with benchmark_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+        usernames = create_history(args.users, args.days)
+        print(f'{args.users} users x {args.days} readings, {args.requests} requests, concurrency {args.concurrency}')
+
+        report('WSGI, sync views', *run_wsgi(usernames, args.requests, args.concurrency))
+        report('ASGI, sync views', *asyncio.run(run_asgi(usernames, args.requests, args.concurrency)))
+        with override_settings(ROOT_URLCONF=async_urlconf()):
+            report('ASGI, async views', *asyncio.run(run_asgi(usernames, args.requests, args.concurrency)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Throughput of the bulk reading import on large CSV and JSONL files.
+
+Usage: python benchmarks/bench_import.py [--rows 100000] [--batch-size 2000]
+"""
+import argparse
+import csv
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from common import benchmark_database, setup_django, timed
+
+
+def write_history(path, rows, fmt):
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(['created', 'meter_1', 'meter_2', 'meter_3', 'meter_4', 'meter_5'])
+        for index in range(rows):
+            created = (start + timedelta(hours=index)).isoformat()
+            values = [index * step for step in (3, 2, 5, 1, 4)]
+            if writer:
+                writer.writerow([created, *values])
+            else:
+                handle.write(json.dumps({'created': created, **{f'meter_{i}': v for i, v in enumerate(values, 1)}}))
+                handle.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+
+    from add_meters.importers import import_readings
+
+    with benchmark_database(), tempfile.TemporaryDirectory() as tmp:
+        for fmt in ('csv', 'jsonl'):
+            path = f'{tmp}/history.{fmt}'
+            write_history(path, args.rows, fmt)
+            user = User.objects.create_user(username=f'bench-{fmt}')
+            with open(path, newline='', encoding='utf-8') as lines:
+                with timed(f'import {args.rows} rows ({fmt}, batch {args.batch_size})', args.rows):
+                    result = import_readings(user, lines, fmt=fmt, batch_size=args.batch_size)
+            assert result.created == args.rows, result.errors[:5]
+
+
+if __name__ == '__main__':
+    main()
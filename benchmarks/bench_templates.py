@@ -0,0 +1,80 @@
+"""Template render time of the dashboard and history pages with and without template caching.
+
+"before" loads every template from disk on each request and renders every summary block;
+"after" uses the configured cached loader and the ``{% cache %}`` summary fragments.
+The analytics cache stays warm in both cases so the numbers isolate rendering.
+Times come from the Server-Timing header written by PerformanceMiddleware.
+
+Usage: python benchmarks/bench_templates.py [--years 1] [--requests 200]
+"""
+import argparse
+import re
+import statistics
+
+from common import benchmark_database, setup_django
+
+PASSWORD = 'bench-pass-123'
+PAGES = (
+    ('profile', '/profile/'),
+    ('detail 30d', '/detail/?period=30'),
+    ('detail all', '/detail/?period=all'),
+)
+TIMING = re.compile(r'(\w+);dur=([\d.]+)')
+
+
+def uncached_templates(templates):
+    backend = {**templates[0], 'OPTIONS': {**templates[0]['OPTIONS']}}
+    # Listed explicitly; with APP_DIRS alone Django would still add the cached loader.
+    backend['OPTIONS']['loaders'] = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    return [backend]
+
+
+def measure(client, url, requests):
+    client.get(url)
+    template_ms, total_ms = [], []
+    for _ in range(requests):
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        timings = {name: float(value) for name, value in TIMING.findall(response['Server-Timing'])}
+        template_ms.append(timings['tpl'])
+        total_ms.append(timings['total'])
+    return statistics.median(template_ms), statistics.median(total_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from add_meters.synthetic import generate_meter_data
+
+    profiles = {
+        'before': {'TEMPLATES': uncached_templates(settings.TEMPLATES), 'TEMPLATE_FRAGMENT_CACHE_TIMEOUT': 0},
+        'after': {},
+    }
+    with benchmark_database(), override_settings(ALLOWED_HOSTS=['testserver'], SERVER_TIMING_HEADER=True):
+        generate_meter_data(1, args.years, prefix='bench-tpl', password=PASSWORD, seed=1)
+        user = User.objects.get(username__startswith='bench-tpl-')
+
+        print(f'{"page":<12} {"profile":<7} {"tpl ms":>8} {"total ms":>9}')
+        for name, url in PAGES:
+            for profile, overrides in profiles.items():
+                with override_settings(**overrides):
+                    client = Client()
+                    client.login(username=user.username, password=PASSWORD)
+                    template_ms, total_ms = measure(client, url, args.requests)
+                print(f'{name:<12} {profile:<7} {template_ms:>8.2f} {total_ms:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Latency percentiles and query counts of the main pages across data sizes.
+
+For every history length in ``--years`` a few users are generated with
+``generate_meter_data``; each page is then requested through Django's test client.
+The analytics cache is cleared before every request unless ``--warm`` is given, so
+the numbers show the cost of a cold page.
+
+Usage: python benchmarks/bench_views.py [--years 0.25 1 3] [--users 3] [--requests 30] [--warm]
+"""
+import argparse
+import statistics
+import time
+
+from common import benchmark_database, setup_django
+
+PASSWORD = 'bench-pass-123'
+PAGES = (
+    ('profile', 'GET', '/profile/'),
+    ('detail 30d', 'GET', '/detail/?period=30'),
+    ('detail 365d', 'GET', '/detail/?period=365'),
+    ('detail all', 'GET', '/detail/?period=all'),
+    ('add', 'POST', '/add/'),
+    ('update', 'POST', '/update/'),
+)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, round(fraction * len(ordered)) - 1)]
+
+
+def next_values(user):
+    from add_meters.latest import get_latest_reading
+    from add_meters.validation import METER_FIELDS
+
+    latest = get_latest_reading(user)
+    return {key: getattr(latest.record, key) + 1 for key in METER_FIELDS}
+
+
+def measure(client, user, method, url, requests, warm):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    latencies, queries = [], []
+    for _ in range(requests):
+        if not warm:
+            cache.clear()
+        data = next_values(user) if method == 'POST' else None
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.post(url, data) if method == 'POST' else client.get(url)
+            latencies.append(time.perf_counter() - started)
+        assert response.status_code in (200, 302), (url, response.status_code)
+        queries.append(len(captured))
+    return latencies, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=float, nargs='+', default=[0.25, 1, 3])
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--warm', action='store_true', help='Keep the analytics cache between requests.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from add_meters.synthetic import generate_meter_data
+
+    with benchmark_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+        print(f'{"years":>5} {"page":<12} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8}')
+        for years in args.years:
+            prefix = f'bench-{years:g}y'
+            generate_meter_data(args.users, years, prefix=prefix, password=PASSWORD, seed=1)
+            users = list(User.objects.filter(username__startswith=f'{prefix}-').order_by('pk'))
+            clients = []
+            for user in users:
+                client = Client()
+                client.login(username=user.username, password=PASSWORD)
+                clients.append((client, user))
+
+            for name, method, url in PAGES:
+                latencies, queries = [], []
+                for client, user in clients:
+                    user_latencies, user_queries = measure(
+                        client, user, method, url, max(1, args.requests // len(clients)), args.warm,
+                    )
+                    latencies += user_latencies
+                    queries += user_queries
+                print(
+                    f'{years:>5g} {name:<12} {statistics.median(latencies) * 1000:>8.1f} '
+                    f'{percentile(latencies, 0.95) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f} '
+                    f'{max(queries):>8}'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks run against a throwaway test database (the same one ``manage.py test``
+would create), so they never touch ``db.sqlite3``.
+"""
+import contextlib
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def setup_django():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'meter.settings')
+    import django
+
+    django.setup()
+
+
+@contextlib.contextmanager
+def benchmark_database():
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextlib.contextmanager
+def timed(label, count=None, unit='rows'):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    rate = f', {count / elapsed:,.0f} {unit}/s' if count else ''
+    print(f'{label}: {elapsed:.3f}s{rate}')
@@ -0,0 +1,63 @@
+"""Build ``DATABASES['default']`` from environment variables.
+
+``DATABASE_ENGINE=sqlite`` (the default) tunes SQLite for a web server: WAL lets readers
+run alongside the single writer, ``synchronous=NORMAL`` is durable enough in WAL mode,
+writers take the lock when their transaction starts (``transaction_mode=IMMEDIATE``)
+and wait up to ``DATABASE_TIMEOUT`` seconds for it instead of failing with "database is
+locked". ``DATABASE_ENGINE=postgres`` reads the usual ``DATABASE_*`` connection variables.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size={mmap_size}',
+    'PRAGMA cache_size=-{cache_kib}',
+)
+
+
+def database_settings(environ, base_dir):
+    engine = environ.get('DATABASE_ENGINE', 'sqlite')
+    common = {
+        # Seconds a connection is reused across requests; 0 closes it after every request.
+        'CONN_MAX_AGE': int(environ.get('DATABASE_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': environ.get('DATABASE_HEALTH_CHECKS', 'True').lower() == 'true',
+    }
+
+    if engine == 'sqlite':
+        pragmas = ';'.join(SQLITE_PRAGMAS).format(
+            mmap_size=int(environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+            cache_kib=int(environ.get('SQLITE_CACHE_KIB', '20000')),
+        )
+        return {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': environ.get('DATABASE_NAME', str(base_dir / 'db.sqlite3')),
+            'OPTIONS': {
+                'timeout': float(environ.get('DATABASE_TIMEOUT', '20')),
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': pragmas,
+            },
+            # A file rather than Django's shared in-memory database, whose table locks
+            # fail concurrent writers immediately instead of waiting on the busy timeout.
+            'TEST': {'NAME': environ.get('DATABASE_TEST_NAME', str(base_dir / 'test_db.sqlite3'))},
+            **common,
+        }
+
+    if engine == 'postgres':
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': environ.get('DATABASE_NAME', 'meter'),
+            'USER': environ.get('DATABASE_USER', 'meter'),
+            'PASSWORD': environ.get('DATABASE_PASSWORD', ''),
+            'HOST': environ.get('DATABASE_HOST', 'localhost'),
+            'PORT': environ.get('DATABASE_PORT', '5432'),
+            'OPTIONS': {
+                'connect_timeout': int(environ.get('DATABASE_TIMEOUT', '10')),
+                'application_name': 'meter',
+            },
+            **common,
+        }
+
+    raise ImproperlyConfigured(f'Unsupported DATABASE_ENGINE {engine!r}; use "sqlite" or "postgres".')
@@ -0,0 +1,220 @@
+"""Per-request performance metrics: a Server-Timing header and a Prometheus endpoint.
+
+Metrics are aggregated in the memory of each process; with several workers every
+process exposes its own numbers, the way the Prometheus client does without its
+multiprocess mode.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+HISTOGRAMS = {
+    'meter_request_duration_seconds': ('Wall time spent in the view stack.', DURATION_BUCKETS),
+    'meter_request_db_queries': ('Database queries per request.', QUERY_BUCKETS),
+    'meter_request_db_seconds': ('Time spent executing database queries.', DURATION_BUCKETS),
+    'meter_request_template_seconds': ('Time spent rendering template responses.', DURATION_BUCKETS),
+    'meter_response_size_bytes': ('Size of non-streaming response bodies.', SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.histograms = {}
+        self.requests = {}
+
+    def record(self, view, method, status, values):
+        with self.lock:
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for name, value in values.items():
+                histogram = self.histograms.get((name, view))
+                if histogram is None:
+                    histogram = self.histograms[(name, view)] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines.append('# HELP meter_requests_total Requests handled, by URL name, method and status.')
+            lines.append('# TYPE meter_requests_total counter')
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(f'meter_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+            for name, (description, _) in HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, view), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, total in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {total}')
+                    lines.append(f'{name}_sum{{view="{view}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{view="{view}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RequestTimer:
+    """Collects the timings of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def track_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+    def start_render(self, response):
+        started = time.perf_counter()
+
+        def finish(rendered):
+            self.template_seconds += time.perf_counter() - started
+            return rendered
+
+        response.add_post_render_callback(finish)
+
+
+# The timer of the request being handled. Context variables follow a request into the
+# sync_to_async threads that run its queries under ASGI, which per-thread connections do not.
+current_timer = ContextVar('performance_timer', default=None)
+
+
+def track_query(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer.track_query(execute, sql, params, many, context)
+
+
+def install_query_tracking(connection, **kwargs):
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_query)
+
+
+connection_created.connect(install_query_tracking)
+
+
+class PerformanceMiddleware:
+    """Times every request and reports it in a Server-Timing header and in ``REGISTRY``.
+
+    Put it first in MIDDLEWARE so the wall time covers the rest of the stack. The
+    body of a streaming response is produced after the middleware returns, so its
+    generation time and size are not included. It runs natively in both the sync
+    and the async stack, so it does not force ASGI requests through a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connections opened before this module was imported missed connection_created.
+        for connection in connections.all(initialized_only=True):
+            install_query_tracking(connection)
+        timer = request.performance_timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, timer, response)
+
+    async def __acall__(self, request):
+        timer = request.performance_timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, timer, response)
+
+    def finish(self, request, timer, response):
+        total = time.perf_counter() - timer.started
+
+        values = {
+            'meter_request_duration_seconds': total,
+            'meter_request_db_queries': timer.db_queries,
+            'meter_request_db_seconds': timer.db_seconds,
+            'meter_request_template_seconds': timer.template_seconds,
+        }
+        if not response.streaming:
+            values['meter_response_size_bytes'] = len(response.content)
+        match = request.resolver_match
+        if match:
+            view = match.view_name
+        elif request.path.startswith(settings.STATIC_URL):
+            # Served by WhiteNoise before URL resolution.
+            view = 'static'
+        else:
+            view = 'unresolved'
+        REGISTRY.record(view, request.method, response.status_code, values)
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timer.db_seconds * 1000:.1f};desc="{timer.db_queries} queries"',
+                f'tpl;dur={timer.template_seconds * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+        return response
+
+    def process_template_response(self, request, response):
+        request.performance_timer.start_render(response)
+        return response
+
+
+def metrics_view(request):
+    """Prometheus text exposition of ``REGISTRY``, for staff users and METRICS_ALLOWED_IPS."""
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', ())
+    if request.META.get('REMOTE_ADDR') not in allowed_ips and not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 import os
 from pathlib import Path
 
+from meter.database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,7 +49,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'meter.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'meter.staticfiles.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,7 +66,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -70,6 +73,14 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory; with DEBUG the autoreloader clears them
+            # whenever a template file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -79,14 +90,75 @@ WSGI_APPLICATION = 'meter.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
+# Configured through DATABASE_* environment variables, see meter/database.py.
 
 DATABASES = {
+    'default': database_settings(os.environ, BASE_DIR),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# locmem is private to each process; use the file backend when running several workers
+# so that analytics invalidation is visible to all of them.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'locmem')],
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
     }
 }
 
+# Seconds a cached dashboard/history summary may live before it is rebuilt, even without new readings.
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv('ANALYTICS_CACHE_TIMEOUT', '300'))
+
+# Seconds a rendered summary fragment ({% cache %} keyed on the data version) may be reused;
+# 0 disables fragment caching.
+TEMPLATE_FRAGMENT_CACHE_TIMEOUT = int(os.getenv('TEMPLATE_FRAGMENT_CACHE_TIMEOUT', str(ANALYTICS_CACHE_TIMEOUT)))
+
+# Upper bound on the points plotted per chart series; longer series are downsampled with LTTB
+# while the totals beside the chart still cover every bucket. Below 3 disables downsampling.
+CHART_MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', '200'))
+
+# Per-request timings (see meter/instrumentation.py). The header reveals query counts, so it is off
+# in production unless enabled; /metrics is open to these addresses and to staff users.
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', str(DEBUG)).lower() == 'true'
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',') if ip]
+
+# Route the dashboard, history and submit pages to their async views; only worth it under ASGI.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
+
+
+# Sessions and the logged-in user are read from the cache on warm requests. cached_db writes
+# through to the database, so a cold cache only costs a lookup; signed_cookies needs no storage
+# at all but cannot be revoked server-side before it expires.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.getenv('SESSION_BACKEND', 'cached_db')]
+
+# New logins use the cached backend; ModelBackend stays listed so sessions created before
+# it was introduced (their session stores the backend path) keep working.
+AUTHENTICATION_BACKENDS = [
+    'add_meters.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Seconds a user object may be served from the cache; saving the user drops it earlier.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60'))
+
+# Background jobs (manage.py run_jobs): seconds before a running job is killed and retried, and
+# the delay before the first retry (doubled for each further attempt).
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', '600'))
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', '30'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -123,6 +195,28 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = Path(os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles'))
+
+# Uploaded import files and finished exports of background jobs.
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media'))
+
+# Outside DEBUG, collectstatic writes content-hashed copies plus .gz (and .br when the brotli
+# package is installed) variants; WhiteNoise serves the hashed names with a one-year immutable
+# Cache-Control and picks the compressed variant the browser accepts.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+# Set from the configured DEBUG (the test runner turns DEBUG off at runtime) so development and
+# test runs look files up per request instead of expecting a collected STATIC_ROOT.
+WHITENOISE_AUTOREFRESH = DEBUG
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
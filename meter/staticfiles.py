@@ -0,0 +1,32 @@
+"""WhiteNoise middleware that also runs natively in Django's async stack.
+
+WhiteNoise's own middleware is sync-only, so under ASGI Django would run every request
+through a thread to call it, one request after another. This subclass only leaves the
+event loop to open a static file; all other requests pass straight through.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
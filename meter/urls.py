@@ -2,8 +2,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from meter.instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('add_meters.urls'))
 
 ]